@@ -0,0 +1,22 @@
+"""Response classes shared by the FastAPI app and its routers.
+
+FastAPI ships an ``ORJSONResponse`` helper, but recent releases mark it as
+deprecated. Keeping a small local equivalent lets the labs use orjson's fast C
+encoder for every endpoint without depending on a deprecated import.
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib ``json`` module.
+
+    Non-string dict keys and NumPy arrays are serialized natively, so future
+    endpoints returning embeddings or scores need no manual conversion.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
@@ -6,15 +6,68 @@ interface. Instructors can use this as a reference for multi-turn chat flows.
 """
 
 import logging
+from typing import Any, AsyncIterator, Callable, Coroutine
 
-from fastapi import APIRouter, HTTPException
+import orjson
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
 from pydantic import BaseModel, constr
 
-from app.services.chatbot import ChatbotServiceError, send_chat_message
+from app.responses import ORJSONResponse
+from app.services.chatbot import ChatbotServiceError, send_chat_message, stream_chat_message
+
+# MessagePack support is optional so the chatbot keeps working with plain JSON
+# when the extra dependency is not installed.
+try:
+    import ormsgpack
+except ImportError:  # pragma: no cover - depends on optional dependency.
+    ormsgpack = None  # type: ignore[assignment]
+
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+
+
+class MsgPackRequest(Request):
+    """Request whose ``json()`` decodes a MessagePack body instead of JSON."""
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            try:
+                self._json = ormsgpack.unpackb(await self.body())
+            except ormsgpack.MsgpackDecodeError as exc:
+                raise HTTPException(status_code=400, detail="Malformed MessagePack body.") from exc
+        return self._json
+
+
+class MsgPackRoute(APIRoute):
+    """Route class that lets clients post MessagePack bodies.
+
+    FastAPI only hands JSON content types to Pydantic, so MessagePack requests
+    are relabelled as JSON and wrapped in ``MsgPackRequest`` whose ``json()``
+    unpacks the original bytes.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        original_route_handler = super().get_route_handler()
+
+        async def custom_route_handler(request: Request) -> Response:
+            content_type = request.headers.get("content-type", "")
+            if ormsgpack is not None and content_type.startswith(MSGPACK_MEDIA_TYPE):
+                scope = dict(request.scope)
+                scope["headers"] = [
+                    (name, b"application/json") if name == b"content-type" else (name, value)
+                    for name, value in request.scope["headers"]
+                ]
+                request = MsgPackRequest(scope, request.receive)
+            return await original_route_handler(request)
+
+        return custom_route_handler
+
 
 # Prefix the router with /chat so all chatbot endpoints are grouped together
 # in the automatically generated FastAPI docs.
-router = APIRouter(prefix="/chat", tags=["chat"])
+router = APIRouter(prefix="/chat", tags=["chat"], route_class=MsgPackRoute)
 
 
 logger = logging.getLogger(__name__)
@@ -35,14 +88,14 @@ class ChatRequest(BaseModel):
 
 
 class ChatResponse(BaseModel):
-    """Response schema returned to the frontend with the assistant's reply."""
+    """Response schema documenting the assistant's reply in the OpenAPI docs."""
 
     role: str
     content: str
 
 
-@router.post("/message", response_model=ChatResponse)
-def chat_message(payload: ChatRequest) -> ChatResponse:
+@router.post("/message", responses={200: {"model": ChatResponse}})
+async def chat_message(payload: ChatRequest, request: Request) -> Response:
     """Handle a chat message and return the assistant's response.
 
     This endpoint demonstrates how to maintain conversation context across
@@ -50,36 +103,83 @@ def chat_message(payload: ChatRequest) -> ChatResponse:
     request, allowing the backend to remain stateless while the LLM maintains
     context awareness.
 
+    Clients that send ``Accept: application/x-msgpack`` receive a MessagePack
+    body instead of JSON, which is smaller and cheaper to encode.
+
     Args:
         payload: Contains the user's message and optional conversation history.
+        request: The incoming request, inspected for content negotiation.
 
     Returns:
         The assistant's response message.
 
     Raises:
-        HTTPException: 422 for validation errors, 503 for service failures.
+        HTTPException: 503 for service failures. Validation errors (such as
+            an empty message) are rejected by Pydantic with a 422 beforehand.
     """
 
     try:
-        # Convert Pydantic models to plain dicts for the service layer
-        history_dicts = (
-            [msg.model_dump() for msg in payload.history]
-            if payload.history
-            else None
-        )
-        
-        result = send_chat_message(
+        # Hand the validated ChatMessage models straight to the service; it
+        # reads ``role``/``content`` as attributes, so no dict copies are needed.
+        result = await send_chat_message(
             message=payload.message,
-            history=history_dicts
+            history=payload.history
         )
-    except ValueError as exc:
-        # Map validation issues (such as an empty message) to an HTTP 422 so
-        # the frontend can display a friendly inline error message.
-        raise HTTPException(status_code=422, detail=str(exc)) from exc
     except ChatbotServiceError as exc:
         # Log the full stack trace for instructors while returning a concise
         # error payload to the browser.
         logger.exception("Chatbot message request failed")
         raise HTTPException(status_code=503, detail=str(exc)) from exc
 
-    return ChatResponse(**result)
+    if ormsgpack is not None and MSGPACK_MEDIA_TYPE in request.headers.get("accept", ""):
+        return Response(content=ormsgpack.packb(result), media_type=MSGPACK_MEDIA_TYPE)
+
+    # Skip re-validating the service result through ``ChatResponse``; the
+    # schema is still published in the OpenAPI docs via ``responses``.
+    return ORJSONResponse(result)
+
+
+def _sse_event(data: dict[str, str], event: str | None = None) -> bytes:
+    """Format one Server-Sent Events frame with a JSON payload."""
+
+    prefix = f"event: {event}\n".encode() if event else b""
+    return prefix + b"data: " + orjson.dumps(data) + b"\n\n"
+
+
+@router.post("/message/stream")
+async def chat_message_stream(payload: ChatRequest) -> StreamingResponse:
+    """Stream the assistant's reply as Server-Sent Events.
+
+    Each ``data:`` frame carries ``{"content": "<chunk>"}`` as soon as Gemini
+    produces it, so the UI can render text before generation finishes. The
+    stream ends with an ``event: done`` frame, or ``event: error`` if Gemini
+    fails part-way through. ``/chat/message`` remains available for clients
+    that want the whole reply at once.
+
+    Raises:
+        HTTPException: 503 when the first chunk cannot be produced (for
+            example, missing credentials), before any bytes are sent.
+    """
+
+    chunks = stream_chat_message(message=payload.message, history=payload.history)
+    try:
+        # Pull the first chunk eagerly so setup failures still map to a 503
+        # instead of an error buried inside an already-started 200 stream.
+        first_chunk = await anext(chunks, None)
+    except ChatbotServiceError as exc:
+        logger.exception("Chatbot stream request failed")
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+    async def event_stream() -> AsyncIterator[bytes]:
+        if first_chunk is not None:
+            yield _sse_event({"content": first_chunk})
+        try:
+            async for chunk in chunks:
+                yield _sse_event({"content": chunk})
+        except ChatbotServiceError as exc:
+            logger.exception("Chatbot stream failed mid-response")
+            yield _sse_event({"detail": str(exc)}, event="error")
+            return
+        yield _sse_event({}, event="done")
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
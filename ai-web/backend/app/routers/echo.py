@@ -9,6 +9,7 @@ Lab 01, where routers, services, and schemas live in their own packages.
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 
+from app.responses import ORJSONResponse
 from app.services.echo import EchoServiceError, get_echo_payload, get_flaky_echo_payload
 
 router = APIRouter(tags=["echo"])
@@ -21,14 +22,14 @@ class EchoIn(BaseModel):
 
 
 @router.post("/echo")
-def echo(payload: EchoIn) -> dict[str, str]:
+def echo(payload: EchoIn) -> ORJSONResponse:
     """Return the payload unchanged so students can verify request plumbing."""
 
-    return get_echo_payload(payload.msg)
+    return ORJSONResponse(get_echo_payload(payload.msg))
 
 
 @router.post("/flaky-echo")
-def flaky_echo(payload: EchoIn, request: Request, failures: int = 1) -> dict[str, int | str]:
+def flaky_echo(payload: EchoIn, request: Request, failures: int = 1) -> ORJSONResponse:
     """Simulate transient failures before eventually returning the echoed message.
 
     The router delegates the retry tracking to the service layer so the example
@@ -38,6 +39,6 @@ def flaky_echo(payload: EchoIn, request: Request, failures: int = 1) -> dict[str
     client_host = request.client.host if request.client else "unknown"
 
     try:
-        return get_flaky_echo_payload(payload.msg, client_host, failures)
+        return ORJSONResponse(get_flaky_echo_payload(payload.msg, client_host, failures))
     except EchoServiceError as exc:  # Translate the domain error into an HTTP error.
         raise HTTPException(status_code=503, detail=str(exc)) from exc
@@ -5,11 +5,23 @@ includes commentary that instructors can echo while teaching the flow.
 """
 
 import logging
+from typing import AsyncIterator
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, constr
+import orjson
 
-from app.services.gemini import GeminiServiceError, generate_lesson_outline
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, constr
+
+from app.responses import ORJSONResponse
+from app.services.gemini import (
+    MAX_BATCH_TOPICS,
+    GeminiServiceError,
+    generate_lesson_outline,
+    generate_lesson_outline_stream,
+    generate_lesson_outlines,
+    generate_many,
+)
 from app.services.lesson_summary import LessonSummaryServiceError, generate_lesson_summary
 
 # Prefix the router with /ai so every Gemini-powered endpoint is grouped
@@ -26,46 +38,123 @@ class LessonOutlineIn(BaseModel):
     topic: constr(strip_whitespace=True, min_length=1)  # type: ignore[valid-type]
 
 
+class LessonOutlinesIn(BaseModel):
+    """Request schema for generating several outlines in one Gemini call."""
+
+    topics: list[constr(strip_whitespace=True, min_length=1)] = Field(  # type: ignore[valid-type]
+        min_length=1, max_length=MAX_BATCH_TOPICS
+    )
+
+
 class LessonOutlineOut(BaseModel):
-    """Response schema returned to the frontend."""
+    """Response schema returned to the frontend (documented in OpenAPI only)."""
 
     topic: str
     outline: list[str]
 
 
-@router.post("/lesson-outline", response_model=LessonOutlineOut)
-def lesson_outline(payload: LessonOutlineIn) -> LessonOutlineOut:
+class LessonOutlineError(BaseModel):
+    """Per-topic failure entry returned by the parallel outline endpoint."""
+
+    topic: str
+    error: str
+
+
+@router.post("/lesson-outline", responses={200: {"model": LessonOutlineOut}})
+async def lesson_outline(payload: LessonOutlineIn) -> ORJSONResponse:
     """Delegate the heavy lifting to the Gemini service layer."""
 
     try:
-        result = generate_lesson_outline(payload.topic)
-    except ValueError as exc:
-        # Map validation issues (such as an empty topic) to an HTTP 422 so the
-        # frontend can display a friendly inline error message.
-        raise HTTPException(status_code=422, detail=str(exc)) from exc
+        result = await generate_lesson_outline(payload.topic)
     except GeminiServiceError as exc:
         # Log the full stack trace for instructors while returning a concise
         # error payload to the browser.
         logger.exception("Gemini lesson outline request failed")
         raise HTTPException(status_code=503, detail=str(exc)) from exc
 
-    return LessonOutlineOut(**result)
+    # The service already returns the response shape, so hand it straight to
+    # orjson instead of re-validating it through ``LessonOutlineOut``.
+    return ORJSONResponse(result)
+
+
+@router.post("/lesson-outline/stream")
+async def lesson_outline_stream(payload: LessonOutlineIn) -> StreamingResponse:
+    """Stream outline bullets as newline-delimited JSON while Gemini generates them.
+
+    Each line is ``{"bullet": "..."}``, so the UI can show the first bullet
+    long before the full outline is ready. A failure after streaming has
+    started is reported as a final ``{"error": "..."}`` line.
+
+    Raises:
+        HTTPException: 503 when the first bullet cannot be produced (for
+            example, missing credentials), before any bytes are sent.
+    """
+
+    bullets = generate_lesson_outline_stream(payload.topic)
+    try:
+        # Pull the first bullet eagerly so setup failures still map to a 503
+        # instead of an error inside an already-started 200 stream.
+        first_bullet = await anext(bullets, None)
+    except GeminiServiceError as exc:
+        logger.exception("Gemini lesson outline stream request failed")
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+    async def ndjson_stream() -> AsyncIterator[bytes]:
+        if first_bullet is not None:
+            yield orjson.dumps({"bullet": first_bullet}) + b"\n"
+        try:
+            async for bullet in bullets:
+                yield orjson.dumps({"bullet": bullet}) + b"\n"
+        except GeminiServiceError as exc:
+            logger.exception("Gemini lesson outline stream failed mid-response")
+            yield orjson.dumps({"error": str(exc)}) + b"\n"
+
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+
+@router.post("/lesson-outlines", responses={200: {"model": list[LessonOutlineOut]}})
+async def lesson_outlines(payload: LessonOutlinesIn) -> ORJSONResponse:
+    """Generate outlines for a batch of topics with a single Gemini request."""
+
+    try:
+        result = await generate_lesson_outlines(payload.topics)
+    except GeminiServiceError as exc:
+        logger.exception("Gemini batch lesson outline request failed")
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+    return ORJSONResponse(result)
+
+
+@router.post(
+    "/lesson-outlines/parallel",
+    responses={200: {"model": list[LessonOutlineOut | LessonOutlineError]}},
+)
+async def lesson_outlines_parallel(payload: LessonOutlinesIn) -> ORJSONResponse:
+    """Generate outlines with one concurrent Gemini request per topic.
+
+    Topics that fail are reported inline as ``{"topic", "error"}`` entries so
+    the rest of the batch is still returned.
+    """
+
+    try:
+        result = await generate_many(payload.topics)
+    except GeminiServiceError as exc:
+        logger.exception("Gemini parallel lesson outline request failed")
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+    return ORJSONResponse(result)
 
 
-@router.post("/lesson-summary", response_model=LessonOutlineOut)
-def lesson_summary(payload: LessonOutlineIn) -> LessonOutlineOut:
+@router.post("/lesson-summary", responses={200: {"model": LessonOutlineOut}})
+async def lesson_summary(payload: LessonOutlineIn) -> ORJSONResponse:
     """Delegate the heavy lifting to the lesson summary service layer."""
 
     try:
-        result = generate_lesson_summary(payload.topic)
-    except ValueError as exc:
-        # Map validation issues (such as an empty topic) to an HTTP 422 so the
-        # frontend can display a friendly inline error message.
-        raise HTTPException(status_code=422, detail=str(exc)) from exc
+        result = await generate_lesson_summary(payload.topic)
     except LessonSummaryServiceError as exc:
         # Log the full stack trace for instructors while returning a concise
         # error payload to the browser.
         logger.exception("Lesson summary request failed")
         raise HTTPException(status_code=503, detail=str(exc)) from exc
 
-    return LessonOutlineOut(**result)
+    return ORJSONResponse(result)
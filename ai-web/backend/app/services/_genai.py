@@ -0,0 +1,77 @@
+"""Gemini SDK plumbing shared by the outline, summary, and chatbot services.
+
+``google.generativeai`` keeps one process-wide client, so the optional import,
+the one-time ``configure`` call, and the per-name model cache live here once
+instead of being repeated in every service module.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from functools import lru_cache
+
+# Import the Gemini SDK lazily so unit tests (or classrooms without credentials)
+# can still import the services and read through the teaching notes.
+try:
+    import google.generativeai as genai
+except ImportError as exc:  # pragma: no cover - handled during runtime usage.
+    genai = None  # type: ignore[assignment]
+    _IMPORT_ERROR = exc
+else:
+    _IMPORT_ERROR = None
+
+# Set once the SDK has been configured. Checking a module flag keeps the hot
+# path to a single global read; the lock only matters for the first requests.
+_CONFIGURED = False
+_CONFIG_LOCK = threading.Lock()
+
+
+def ensure_configured(error_cls: type[Exception]) -> None:
+    """Configure the global Gemini client once per process.
+
+    The API key is read from the environment on the first call only. Later
+    calls return as soon as they see the ``_CONFIGURED`` flag, and the
+    double-checked lock stops concurrent first requests from configuring the
+    SDK twice.
+
+    Args:
+        error_cls: The calling service's exception type, raised when the API
+            key or the SDK is missing so each router keeps catching its own
+            error.
+    """
+
+    global _CONFIGURED
+    if _CONFIGURED:
+        return
+    with _CONFIG_LOCK:
+        if _CONFIGURED:
+            return
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise error_cls(
+                "GEMINI_API_KEY is not configured. Add it to backend/.env before calling the service."
+            )
+        if genai is None:  # pragma: no cover - depends on optional dependency.
+            raise error_cls(
+                "google-generativeai is not installed. Run `pip install google-generativeai` to enable the feature."
+            ) from _IMPORT_ERROR
+        genai.configure(api_key=api_key)
+        _CONFIGURED = True
+
+
+@lru_cache(maxsize=8)
+def get_model(name: str):
+    """Return a cached ``GenerativeModel`` so each model is only built once."""
+
+    return genai.GenerativeModel(name)
+
+
+def response_text(response) -> str:
+    """Return a reply's text for the line-by-line outline parsers.
+
+    The parsers strip every line themselves, so the full reply is not copied
+    by a whole-string strip first; ``None`` or missing text counts as empty.
+    """
+
+    return getattr(response, "text", None) or ""
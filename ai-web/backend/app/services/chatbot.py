@@ -9,79 +9,72 @@ can walk through the implementation during labs.
 from __future__ import annotations
 
 import os
-from functools import lru_cache
-from typing import List
+import re
+from typing import AsyncIterator, Protocol, Sequence
+
+from app.services import _genai
+
+# Patterns used by ``_clean_response_text`` are compiled once at import time
+# instead of being looked up in ``re``'s cache on every Gemini response.
+_MULTI_NL = re.compile(r"\n{3,}")
+_DOT_CAP = re.compile(r"\.([A-Z])")
+_COMMA_WORD = re.compile(r",([A-Za-z])")
+
+# System instructions sent ahead of every conversation. Keeping them as a
+# module constant avoids rebuilding the string per request and makes prompt
+# changes easy to review in diffs.
+_SYSTEM_PROMPT = (
+    "You are a helpful AI teaching assistant for a web programming course. "
+    "Provide clear, well-structured answers about web development, AI integration, "
+    "FastAPI, React, and related technologies. "
+    "\n\nGuidelines:"
+    "\n- Keep responses concise and educational"
+    "\n- Use proper formatting with clear paragraphs"
+    "\n- When listing items, use clear numbering or bullet points"
+    "\n- Avoid excessive markdown formatting"
+    "\n- Focus on practical, actionable information"
+    "\n- Stay relevant to web programming topics"
+)
+
+# Prompt prefix for requests without history; only the user message is appended.
+_PROMPT_PREFIX_NO_HISTORY = f"{_SYSTEM_PROMPT}\n\nUser: "
+
+# Transcript prefix for each role the model understands; other roles are skipped.
+_ROLE_PREFIX = {"user": "User: ", "assistant": "Assistant: "}
+
+
+class HistoryMessage(Protocol):
+    """Shape of a history entry; the router's ``ChatMessage`` model satisfies it.
+
+    Typing history structurally keeps the service independent of the router,
+    so any object with ``role`` and ``content`` attributes can be passed in.
+    """
 
-# Import the Gemini SDK lazily so unit tests (or classrooms without credentials)
-# can still import the module and read through the teaching notes.
-try:
-    import google.generativeai as genai
-except ImportError as exc:  # pragma: no cover - handled during runtime usage.
-    genai = None  # type: ignore[assignment]
-    _IMPORT_ERROR = exc
-else:
-    _IMPORT_ERROR = None
+    role: str
+    content: str
 
 
 class ChatbotServiceError(RuntimeError):
     """Raised when the chatbot service cannot fulfill a request."""
 
 
-def _require_api_key() -> str:
-    """Read the API key from the environment and raise a descriptive error.
-
-    The helper keeps API key access in one place so the error message remains
-    consistent every time an instructor demonstrates a misconfigured setup.
-    """
-
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ChatbotServiceError(
-            "GEMINI_API_KEY is not configured. Add it to backend/.env before calling the service."
-        )
-    return api_key
-
-
-@lru_cache(maxsize=1)
-def _configure_client(api_key: str) -> bool:
-    """Configure the global Gemini client once per process.
-
-    The return value is a simple boolean so callers can ignore the result and
-    focus on the fact that the client has been prepared for use.
-    """
-
-    if genai is None:  # pragma: no cover - depends on optional dependency.
-        raise ChatbotServiceError(
-            "google-generativeai is not installed. Run `pip install google-generativeai` to enable the feature."
-        ) from _IMPORT_ERROR
-
-    genai.configure(api_key=api_key)
-    return True
-
-
-def _build_conversation_context(history: List[dict[str, str]]) -> str:
+def _build_conversation_context(history: Sequence[HistoryMessage]) -> str:
     """Convert message history into a formatted context string for the model.
 
     Args:
-        history: List of message dictionaries containing 'role' and 'content'.
+        history: Messages with ``role`` and ``content`` attributes, such as the
+            router's validated ``ChatMessage`` models. The attributes are read
+            directly, which avoids converting each message to a dict first.
 
     Returns:
         A formatted string representing the conversation history.
     """
 
-    if not history:
-        return ""
-
-    context_parts = []
-    for msg in history:
-        role = msg.get("role", "user")
-        content = msg.get("content", "")
-        if role == "user":
-            context_parts.append(f"User: {content}")
-        elif role == "assistant":
-            context_parts.append(f"Assistant: {content}")
-    
-    return "\n".join(context_parts)
+    return "\n".join(
+        f"{_ROLE_PREFIX[msg.role]}{msg.content}"
+        for msg in history
+        if msg.role in _ROLE_PREFIX
+    )
 
 
 def _clean_response_text(raw_text: str) -> str:
@@ -104,20 +97,18 @@ def _clean_response_text(raw_text: str) -> str:
     cleaned = raw_text.strip()
     
     # Replace multiple consecutive newlines with double newline (paragraph breaks)
-    import re
-    cleaned = re.sub(r'\n{3,}', '\n\n', cleaned)
+    cleaned = _MULTI_NL.sub('\n\n', cleaned)
     
     # Remove leading/trailing whitespace from each line
-    lines = [line.strip() for line in cleaned.split('\n')]
-    cleaned = '\n'.join(lines)
+    cleaned = '\n'.join(line.strip() for line in cleaned.split('\n'))
     
     # Fix common formatting issues from Gemini responses
     # Remove asterisks used for bold in markdown if they appear inconsistently
     # cleaned = re.sub(r'\*\*([^*]+)\*\*', r'\1', cleaned)  # Uncomment to remove bold
     
     # Ensure proper spacing after periods and commas
-    cleaned = re.sub(r'\.([A-Z])', r'. \1', cleaned)
-    cleaned = re.sub(r',([A-Za-z])', r', \1', cleaned)
+    cleaned = _DOT_CAP.sub(r'. \1', cleaned)
+    cleaned = _COMMA_WORD.sub(r', \1', cleaned)
     
     # Remove any leading/trailing special characters that might have slipped through
     cleaned = cleaned.strip('*-_')
@@ -125,18 +116,42 @@ def _clean_response_text(raw_text: str) -> str:
     return cleaned
 
 
-def send_chat_message(
+def _build_prompt(message: str, history: Sequence[HistoryMessage] | None) -> str:
+    """Combine the system prompt, optional history, and the new user message."""
+
+    # Requests without history only append the user's message to the
+    # precomputed prompt prefix.
+    conversation_context = _build_conversation_context(history) if history else ""
+    if conversation_context:
+        return f"{_SYSTEM_PROMPT}\n\n{conversation_context}\nUser: {message}\nAssistant:"
+    return f"{_PROMPT_PREFIX_NO_HISTORY}{message}\nAssistant:"
+
+
+def _service_error(exc: Exception) -> ChatbotServiceError:
+    """Wrap an SDK failure in a ``ChatbotServiceError`` with a readable detail."""
+
+    raw_message = str(exc).strip()
+    if raw_message:
+        detail = f": {raw_message}"
+    else:
+        fallback = exc.__class__.__name__
+        detail = f": {fallback}"
+    return ChatbotServiceError(f"Failed to generate chatbot response{detail}.")
+
+
+async def send_chat_message(
     message: str,
-    history: List[dict[str, str]] | None = None,
+    history: Sequence[HistoryMessage] | None = None,
     model: str | None = None
 ) -> dict[str, str]:
     """Send a message to the chatbot and get a response with conversation context.
 
     Args:
-        message: The user's message to send to the chatbot.
+        message: The user's message to send to the chatbot. The router's
+            ``constr`` already strips it and rejects empty values.
         history: Optional list of previous messages to provide context. Each
-            message should be a dict with 'role' ('user' or 'assistant') and
-            'content' (the message text).
+            message is a ``HistoryMessage`` with a ``role`` ('user' or 'assistant')
+            and ``content`` (the message text).
         model: Optional override so the labs can experiment with different
             Gemini releases. Defaults to ``GEMINI_MODEL`` or ``gemini-2.5-flash``.
 
@@ -145,46 +160,19 @@ def send_chat_message(
         field matching the structure expected by the frontend.
 
     Raises:
-        ValueError: If the message is empty after trimming whitespace.
         ChatbotServiceError: When credentials are missing, the SDK is not
             installed, or the Gemini API reports an error.
     """
 
-    normalized_message = message.strip()
-    if not normalized_message:
-        raise ValueError("Message must not be empty.")
-
-    api_key = _require_api_key()
-    _configure_client(api_key)  # Cache-aware setup keeps repeated requests fast.
+    _genai.ensure_configured(ChatbotServiceError)  # Flag-guarded setup keeps repeated requests fast.
 
     selected_model = model or os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
     
     try:
-        generative_model = genai.GenerativeModel(selected_model)
+        generative_model = _genai.get_model(selected_model)
         
-        # Build the full prompt including conversation history and system instructions
-        system_prompt = (
-            "You are a helpful AI teaching assistant for a web programming course. "
-            "Provide clear, well-structured answers about web development, AI integration, "
-            "FastAPI, React, and related technologies. "
-            "\n\nGuidelines:"
-            "\n- Keep responses concise and educational"
-            "\n- Use proper formatting with clear paragraphs"
-            "\n- When listing items, use clear numbering or bullet points"
-            "\n- Avoid excessive markdown formatting"
-            "\n- Focus on practical, actionable information"
-            "\n- Stay relevant to web programming topics"
-        )
-        
-        # Include conversation history if provided
-        conversation_context = _build_conversation_context(history or [])
-        
-        if conversation_context:
-            full_prompt = f"{system_prompt}\n\n{conversation_context}\nUser: {normalized_message}\nAssistant:"
-        else:
-            full_prompt = f"{system_prompt}\n\nUser: {normalized_message}\nAssistant:"
-        
-        response = generative_model.generate_content(full_prompt)
+        full_prompt = _build_prompt(message, history)
+        response = await generative_model.generate_content_async(full_prompt)
         response_text = getattr(response, "text", "").strip()
         
         if not response_text:
@@ -194,14 +182,39 @@ def send_chat_message(
             response_text = _clean_response_text(response_text)
             
     except Exception as exc:  # pragma: no cover - depends on remote API.
-        raw_message = str(exc).strip()
-        if raw_message:
-            detail = f": {raw_message}"
-        else:
-            fallback = exc.__class__.__name__
-            detail = f": {fallback}"
-        raise ChatbotServiceError(
-            f"Failed to generate chatbot response{detail}."
-        ) from exc
+        raise _service_error(exc) from exc
 
     return {"role": "assistant", "content": response_text}
+
+
+async def stream_chat_message(
+    message: str,
+    history: Sequence[HistoryMessage] | None = None,
+    model: str | None = None
+) -> AsyncIterator[str]:
+    """Yield the assistant's reply chunk by chunk as Gemini generates it.
+
+    The prompt and arguments match ``send_chat_message``. The chunks are raw
+    model text: ``_clean_response_text`` needs the whole reply, so it is not
+    applied here.
+
+    Raises:
+        ChatbotServiceError: When credentials are missing, the SDK is not
+            installed, or the Gemini API reports an error mid-stream.
+    """
+
+    _genai.ensure_configured(ChatbotServiceError)
+
+    selected_model = model or os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+
+    try:
+        generative_model = _genai.get_model(selected_model)
+        response = await generative_model.generate_content_async(
+            _build_prompt(message, history), stream=True
+        )
+        async for chunk in response:
+            text = getattr(chunk, "text", "")
+            if text:
+                yield text
+    except Exception as exc:  # pragma: no cover - depends on remote API.
+        raise _service_error(exc) from exc
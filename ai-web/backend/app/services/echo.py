@@ -6,22 +6,16 @@ matches the separation of concerns demonstrated in the accompanying lab
 notebooks and gives instructors a concrete example to reference in class.
 """
 
-from dataclasses import dataclass
-
 
 class EchoServiceError(RuntimeError):
     """Raised when the flaky echo service needs to signal a transient failure."""
 
 
-@dataclass
-class _FlakyState:
-    """Internal data structure to keep track of how many failures each client saw."""
-
-    attempts: int = 0
-
+# Module-level dictionary storing retry counts keyed by (client, failures).
+_FLAKY_ATTEMPTS: dict[tuple[str, int], int] = {}
 
-# Module-level dictionary storing retry counts keyed by client identifier.
-_FLAKY_ATTEMPTS: dict[str, _FlakyState] = {}
+# Upper bound on tracked clients so unique hosts cannot grow the dict forever.
+_FLAKY_MAX_KEYS = 1024
 
 
 def get_echo_payload(message: str) -> dict[str, str]:
@@ -44,14 +38,17 @@ def get_flaky_echo_payload(message: str, client_host: str, failures: int) -> dic
             window and needs the client to retry.
     """
 
-    key = f"{client_host}:{failures}"
-    state = _FLAKY_ATTEMPTS.setdefault(key, _FlakyState())
+    key = (client_host, failures)
+    attempts = _FLAKY_ATTEMPTS.get(key, 0)
 
-    if state.attempts < failures:
-        state.attempts += 1
+    if attempts < failures:
+        if key not in _FLAKY_ATTEMPTS and len(_FLAKY_ATTEMPTS) >= _FLAKY_MAX_KEYS:
+            # Evict the oldest entry; dicts keep insertion order.
+            del _FLAKY_ATTEMPTS[next(iter(_FLAKY_ATTEMPTS))]
+        _FLAKY_ATTEMPTS[key] = attempts + 1
         raise EchoServiceError("Simulated transient failure")
 
-    attempts = state.attempts + 1  # Count the successful request as an attempt.
-    _FLAKY_ATTEMPTS[key] = _FlakyState()  # Reset tracking for the next exercise run.
+    _FLAKY_ATTEMPTS.pop(key, None)  # Reset tracking for the next exercise run.
 
-    return {"msg": message, "attempts": attempts}
+    # Count the successful request as an attempt.
+    return {"msg": message, "attempts": attempts + 1}
@@ -9,55 +9,180 @@ class.
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import os
+import re
 from functools import lru_cache
-from typing import List
+from typing import AsyncIterator, List, Sequence
 
-# Import the Gemini SDK lazily so unit tests (or classrooms without credentials)
-# can still import the module and read through the teaching notes.
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential, wait_random
+
+from app.services import _genai
+from app.services.rate_limit import TokenBucket
+
+# The SDK's transient HTTP errors (429 and 503) live in google.api_core, which
+# ships alongside google-generativeai.
 try:
-    import google.generativeai as genai
-except ImportError as exc:  # pragma: no cover - handled during runtime usage.
-    genai = None  # type: ignore[assignment]
-    _IMPORT_ERROR = exc
+    from google.api_core import exceptions as google_exceptions
+except ImportError:  # pragma: no cover - handled during runtime usage.
+    _TRANSIENT_SDK_ERRORS: tuple[type[Exception], ...] = ()
 else:
-    _IMPORT_ERROR = None
+    _TRANSIENT_SDK_ERRORS = (
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.ResourceExhausted,
+    )
+
+# Numba is optional: when it is installed, very large batch replies are parsed
+# by a compiled byte scanner instead of the per-line Python loop.
+try:
+    import numba
+    import numpy as np
+except ImportError:  # pragma: no cover - the pure-Python parser is used instead.
+    numba = None  # type: ignore[assignment]
+    np = None  # type: ignore[assignment]
+
+
+# Lesson outlines are cached in-process so repeated topics skip the Gemini
+# round-trip. ``GEMINI_CACHE_MODE`` selects the policy:
+#   enabled   - serve cached outlines and store new ones (default)
+#   read_only - serve cached outlines but never store new ones
+#   replay    - serve cached outlines only; a miss raises instead of calling
+#               Gemini, which keeps tests and metric runs off the network
+#   disabled  - always call Gemini
+_CACHE_MODES = ("enabled", "read_only", "replay", "disabled")
+# Entries are immutable ``(topic, outline)`` tuples, so a hit only needs to
+# build one fresh list instead of deep-copying a stored dictionary.
+_RESPONSE_CACHE: dict[str, tuple[str, tuple[str, ...]]] = {}
+_RESPONSE_CACHE_MAX_ENTRIES = 512
+
+# Single-topic outline prompt, filled in with ``%`` so each request does a
+# single substitution instead of rebuilding the f-string.
+_PROMPT_TEMPLATE = (
+    "You are helping an instructor design a web programming lesson. "
+    "Return a concise outline with 3-5 bullet points that cover the key "
+    "concepts for the topic: %s."
+)
+
+# Derived from the template so editing the prompt automatically invalidates
+# cached outlines; hashed once at import rather than per cache lookup.
+_PROMPT_VERSION = hashlib.sha256(_PROMPT_TEMPLATE.encode("utf-8")).hexdigest()[:12]
+
+# Batch requests pack several topics into one prompt. The cap keeps the prompt
+# and the combined reply comfortably inside the model's token limits.
+MAX_BATCH_TOPICS = 20
+_OUTLINE_MARKER = re.compile(r"\[OUTLINE\s+(\d+)\]")
+
+# Leading Markdown bullets, numbering, and whitespace that models put in front
+# of outline items. Compiled once instead of rescanning a ``lstrip`` argument
+# for every line.
+_LEADING_BULLET_RE = re.compile(r"^[-*\u2022.0-9\s]+")
+
+# Runs of characters between line breaks, using the same boundaries as
+# ``str.splitlines``. Iterating matches avoids building the full list of lines
+# that ``splitlines`` returns before any of them is cleaned.
+_LINE_RE = re.compile(r"[^\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]+")
 
 
 class GeminiServiceError(RuntimeError):
     """Raised when the Gemini helper cannot fulfill a request."""
 
 
-def _require_api_key() -> str:
-    """Read the API key from the environment and raise a descriptive error.
+def _cache_mode() -> str:
+    """Return the configured response cache policy, validating the value."""
 
-    The helper keeps API key access in one place so the error message remains
-    consistent every time an instructor demonstrates a misconfigured setup.
-    """
-
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
+    mode = os.getenv("GEMINI_CACHE_MODE", "enabled").strip().lower() or "enabled"
+    if mode not in _CACHE_MODES:
         raise GeminiServiceError(
-            "GEMINI_API_KEY is not configured. Add it to backend/.env before calling the service."
+            f"GEMINI_CACHE_MODE must be one of {', '.join(_CACHE_MODES)}; got {mode!r}."
         )
-    return api_key
+    return mode
+
+
+@lru_cache(maxsize=256)
+def _cache_key(topic: str, model: str) -> str:
+    """Hash the inputs that determine an outline into a stable cache key.
+
+    Memoized so hot topics skip the SHA-256 on repeat lookups.
+    """
+
+    return hashlib.sha256(f"{topic}|{model}|{_PROMPT_VERSION}".encode("utf-8")).hexdigest()
+
+
+def _store_cached_outline(key: str, topic: str, outline: Sequence[str]) -> None:
+    """Save an outline, evicting the oldest entry once the cache is full."""
+
+    if key not in _RESPONSE_CACHE and len(_RESPONSE_CACHE) >= _RESPONSE_CACHE_MAX_ENTRIES:
+        del _RESPONSE_CACHE[next(iter(_RESPONSE_CACHE))]
+    _RESPONSE_CACHE[key] = (topic, tuple(outline))
 
 
 @lru_cache(maxsize=1)
-def _configure_client(api_key: str) -> bool:
-    """Configure the global Gemini client once per process.
+def _rate_limiter() -> TokenBucket:
+    """Build the per-process Gemini rate limiter on first use.
+
+    Construction is deferred until the first request so the limits are read
+    after ``load_dotenv`` has populated ``GEMINI_RPM`` and ``GEMINI_TPM``.
+    """
+
+    return TokenBucket.from_env()
+
+
+# Errors worth retrying: network hiccups plus Gemini rate limiting and
+# temporary unavailability. Anything else fails the request immediately.
+_TRANSIENT = (TimeoutError, ConnectionError, *_TRANSIENT_SDK_ERRORS)
+
+
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=0.5, max=4) + wait_random(0, 0.5),
+    retry=retry_if_exception_type(_TRANSIENT),
+    reraise=True,
+)
+async def _generate_with_retry(generative_model, prompt: str, **kwargs):
+    """Call ``generate_content_async``, retrying transient failures with backoff.
+
+    Up to three attempts are made, waiting roughly 0.5s and then 1s (plus
+    jitter) between them. ``reraise=True`` hands the last SDK exception to
+    the caller, so error messages look the same as without retries. For
+    streamed calls only opening the stream is retried.
 
-    The return value is a simple boolean so callers can ignore the result and
-    focus on the fact that the client has been prepared for use.
+    Every attempt first waits on the rate limiter, estimating about four
+    characters per prompt token plus 512 tokens for the reply.
     """
 
-    if genai is None:  # pragma: no cover - depends on optional dependency.
+    await _rate_limiter().acquire(estimated_tokens=len(prompt) // 4 + 512)
+    return await generative_model.generate_content_async(prompt, **kwargs)
+
+
+def _lookup_cached_outline(
+    cache_mode: str, cache_key: str, topic: str
+) -> tuple[str, tuple[str, ...]] | None:
+    """Return the cached ``(topic, outline)`` entry according to ``cache_mode``.
+
+    In replay mode a miss raises instead of returning ``None``.
+    """
+
+    if cache_mode == "disabled":
+        return None
+    cached = _RESPONSE_CACHE.get(cache_key)
+    if cached is None and cache_mode == "replay":
         raise GeminiServiceError(
-            "google-generativeai is not installed. Run `pip install google-generativeai` to enable the feature."
-        ) from _IMPORT_ERROR
+            f"No cached lesson outline for {topic!r} and GEMINI_CACHE_MODE=replay."
+        )
+    return cached
+
+
+def _service_error(exc: Exception, what: str) -> GeminiServiceError:
+    """Wrap an SDK failure in a ``GeminiServiceError`` with a readable detail."""
 
-    genai.configure(api_key=api_key)
-    return True
+    raw_message = str(exc).strip()
+    if raw_message:
+        detail = f": {raw_message}"
+    else:
+        fallback = exc.__class__.__name__
+        detail = f": {fallback}"
+    return GeminiServiceError(f"Failed to generate {what}{detail}.")
 
 
 def _parse_outline_lines(raw_outline: str) -> List[str]:
@@ -68,65 +193,337 @@ def _parse_outline_lines(raw_outline: str) -> List[str]:
     plain text list items.
     """
 
-    lines: List[str] = []
-    for line in raw_outline.splitlines():
-        cleaned = line.strip()
-        if not cleaned:
-            continue
-        # Remove leading numbering/bullet characters that models often return.
-        cleaned = cleaned.lstrip("-*•0123456789. \t")
-        if cleaned:
-            lines.append(cleaned)
-    return lines
+    # Strip leading numbering/bullet characters with the precompiled pattern;
+    # the walrus keeps each cleaned line so blank results are skipped in the
+    # same pass. Binding ``sub`` to a local skips the global and attribute
+    # lookups on every line. The pattern also matches whitespace, so stripping
+    # the line first leaves nothing to trim afterwards.
+    sub = _LEADING_BULLET_RE.sub
+    return [
+        cleaned
+        for match in _LINE_RE.finditer(raw_outline)
+        if (cleaned := sub("", match.group().strip()))
+    ]
+
+
+# Replies shorter than this are parsed in Python; below it the UTF-8 encode
+# and kernel call cost more than the loop they replace.
+_FAST_PARSE_MIN_CHARS = 16_384
+
+if numba is not None:
+    # Bytes the kernel skips at the start of a line: the ASCII characters of
+    # ``_LEADING_BULLET_RE`` plus every byte ``str.isspace`` treats as blank.
+    _SKIP_BYTES = np.zeros(256, dtype=np.bool_)
+    _SKIP_BYTES[np.frombuffer(b"-*.0123456789 \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f", dtype=np.uint8)] = True
+
+    # The kernel splits on ``\n`` only, so the other ASCII boundaries that
+    # ``str.splitlines`` honours are mapped to it first. A ``\r\n`` pair turns
+    # into an empty line, which is dropped like any other blank line.
+    _ASCII_LINE_BREAKS = bytes.maketrans(b"\r\x0b\x0c\x1c\x1d\x1e", b"\n" * 6)
+
+    # Non-ASCII characters that ``str.splitlines`` or ``str.strip`` treat as
+    # breaks or whitespace. The byte kernel cannot see them, so replies that
+    # contain any are parsed in Python instead.
+    _UNICODE_SPACE_RE = re.compile("[\x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000]")
+
+    @numba.njit(cache=True)
+    def _scan_outline_bytes(buf, skip):  # pragma: no cover - compiled by numba.
+        """Return ``(start, end)`` offsets of each non-empty cleaned line in ``buf``."""
+
+        size = buf.shape[0]
+        line_count = 1
+        for index in range(size):
+            if buf[index] == 10:
+                line_count += 1
 
+        spans = np.empty((line_count, 2), dtype=np.int32)
+        found = 0
+        line_start = 0
+        for index in range(size + 1):
+            if index < size and buf[index] != 10:
+                continue
+            start = line_start
+            end = index
+            line_start = index + 1
+            while start < end:
+                if skip[buf[start]]:
+                    start += 1
+                elif (
+                    start + 2 < end
+                    and buf[start] == 0xE2
+                    and buf[start + 1] == 0x80
+                    and buf[start + 2] == 0xA2
+                ):
+                    start += 3  # UTF-8 encoding of the U+2022 bullet.
+                else:
+                    break
+            while end > start:
+                last = buf[end - 1]
+                if last != 32 and not 9 <= last <= 13 and not 28 <= last <= 31:
+                    break
+                end -= 1
+            if end > start:
+                spans[found, 0] = start
+                spans[found, 1] = end
+                found += 1
+        return spans[:found]
 
-def generate_lesson_outline(topic: str, model: str | None = None) -> dict[str, str | list[str]]:
+    def _parse_outline_lines_fast(raw_outline: str) -> List[str]:
+        """Numba-backed equivalent of ``_parse_outline_lines`` for large replies.
+
+        Numba cannot work with ``str`` efficiently, so the text is scanned as a
+        UTF-8 byte buffer and only the surviving slices are decoded. Line
+        boundaries and whitespace match ``_parse_outline_lines``: ASCII breaks
+        are normalized to ``\\n`` and replies with Unicode breaks or spaces
+        fall back to the Python parser.
+        """
+
+        if not raw_outline.isascii() and _UNICODE_SPACE_RE.search(raw_outline):
+            return _parse_outline_lines(raw_outline)
+        data = raw_outline.encode("utf-8").translate(_ASCII_LINE_BREAKS)
+        spans = _scan_outline_bytes(np.frombuffer(data, dtype=np.uint8), _SKIP_BYTES)
+        return [data[start:end].decode("utf-8") for start, end in spans.tolist()]
+
+else:  # pragma: no cover - exercised only without numba installed.
+    _parse_outline_lines_fast = None
+
+
+def _parse_outline_text(raw_outline: str) -> List[str]:
+    """Parse an outline reply, using the compiled scanner for large inputs."""
+
+    if _parse_outline_lines_fast is not None and len(raw_outline) >= _FAST_PARSE_MIN_CHARS:
+        return _parse_outline_lines_fast(raw_outline)
+    return _parse_outline_lines(raw_outline)
+
+
+async def generate_lesson_outline(topic: str, model: str | None = None) -> dict[str, str | list[str]]:
     """Generate a course outline for the requested topic using Gemini.
 
     Args:
-        topic: Instructor-provided lesson topic from the frontend form.
+        topic: Instructor-provided lesson topic from the frontend form. The
+            router's ``constr`` already strips it and rejects empty values.
         model: Optional override so the labs can experiment with different
             Gemini releases. Defaults to ``GEMINI_MODEL`` or ``gemini-2.5-flash``.
 
     Returns:
-        Dictionary containing the normalized topic string and a list of outline
+        Dictionary containing the topic string and a list of outline
         bullet points. The structure matches the response model defined in
         ``app/routers/gemini.py``.
 
     Raises:
-        ValueError: If the topic is empty after trimming whitespace.
         GeminiServiceError: When credentials are missing, the SDK is not
-            installed, or the Gemini API reports an error.
+            installed, the Gemini API reports an error, or
+            ``GEMINI_CACHE_MODE=replay`` has no cached outline for the topic.
+    """
+
+    selected_model = model or os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+
+    # Check the response cache before touching credentials so replay mode
+    # works without an API key.
+    cache_mode = _cache_mode()
+    cache_key = _cache_key(topic, selected_model)
+    cached = _lookup_cached_outline(cache_mode, cache_key, topic)
+    if cached is not None:
+        cached_topic, cached_outline = cached
+        return {"topic": cached_topic, "outline": list(cached_outline)}
+
+    _genai.ensure_configured(GeminiServiceError)  # Flag-guarded setup keeps repeated requests fast.
+
+    try:
+        generative_model = _genai.get_model(selected_model)
+        response = await _generate_with_retry(generative_model, _PROMPT_TEMPLATE % topic)
+        outline_text = _genai.response_text(response)
+    except Exception as exc:  # pragma: no cover - depends on remote API.
+        raise _service_error(exc, "lesson outline") from exc
+
+    outline = _parse_outline_text(outline_text)
+    result = {"topic": topic, "outline": outline}
+    if cache_mode == "enabled":
+        _store_cached_outline(cache_key, topic, outline)
+    return result
+
+
+async def generate_lesson_outline_stream(topic: str, model: str | None = None) -> AsyncIterator[str]:
+    """Yield cleaned outline bullets one by one while Gemini is still generating.
+
+    Streamed chunks rarely end on a line boundary, so text is buffered and
+    only complete lines are cleaned and yielded; whatever remains when the
+    stream ends is treated as the final line. Cached outlines are replayed
+    bullet by bullet, and a completed stream is stored under the same key as
+    ``generate_lesson_outline`` uses.
+
+    Raises:
+        GeminiServiceError: Under the same conditions as
+            ``generate_lesson_outline``, including errors raised mid-stream.
+    """
+
+    selected_model = model or os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+
+    cache_mode = _cache_mode()
+    cache_key = _cache_key(topic, selected_model)
+    cached = _lookup_cached_outline(cache_mode, cache_key, topic)
+    if cached is not None:
+        for bullet in cached[1]:
+            yield bullet
+        return
+
+    _genai.ensure_configured(GeminiServiceError)
+
+    outline: list[str] = []
+    buffer = ""
+    try:
+        generative_model = _genai.get_model(selected_model)
+        response = await _generate_with_retry(generative_model, _PROMPT_TEMPLATE % topic, stream=True)
+        async for chunk in response:
+            buffer += getattr(chunk, "text", "") or ""
+            while "\n" in buffer:
+                line, buffer = buffer.split("\n", 1)
+                cleaned = _LEADING_BULLET_RE.sub("", line).strip()
+                if cleaned:
+                    outline.append(cleaned)
+                    yield cleaned
+    except Exception as exc:  # pragma: no cover - depends on remote API.
+        raise _service_error(exc, "lesson outline") from exc
+
+    cleaned = _LEADING_BULLET_RE.sub("", buffer).strip()
+    if cleaned:
+        outline.append(cleaned)
+        yield cleaned
+
+    if cache_mode == "enabled":
+        _store_cached_outline(cache_key, topic, outline)
+
+
+def _split_batch_outlines(raw_text: str, count: int) -> list[list[str]]:
+    """Split a batch reply on its ``[OUTLINE n]`` markers into per-topic outlines.
+
+    ``re.split`` with a capture group alternates text and marker numbers, so
+    the pieces after the preamble come in ``(number, body)`` pairs. Numbers
+    outside ``1..count`` are ignored and topics the model skipped get an
+    empty outline.
+    """
+
+    outlines: list[list[str]] = [[] for _ in range(count)]
+    parts = _OUTLINE_MARKER.split(raw_text)
+    for number, body in zip(parts[1::2], parts[2::2]):
+        index = int(number) - 1
+        if 0 <= index < count:
+            outlines[index] = _parse_outline_text(body)
+    return outlines
+
+
+async def generate_lesson_outlines(
+    topics: Sequence[str], model: str | None = None
+) -> list[dict[str, str | list[str]]]:
+    """Generate outlines for several topics with a single Gemini request.
+
+    Batching amortizes the instruction tokens and the network round-trip
+    across every topic, so bulk requests finish in roughly the time of one.
+    The model is asked to label each answer ``[OUTLINE n]`` and the reply is
+    split on those markers.
+
+    Args:
+        topics: Up to ``MAX_BATCH_TOPICS`` already-validated topic strings.
+        model: Optional Gemini model override, as in ``generate_lesson_outline``.
+
+    Returns:
+        One ``{"topic", "outline"}`` dictionary per topic, in request order.
+
+    Raises:
+        GeminiServiceError: When the batch is too large, credentials are
+            missing, the SDK is not installed, or the Gemini API reports an error.
     """
 
-    normalized_topic = topic.strip()
-    if not normalized_topic:
-        raise ValueError("Topic must not be empty.")
+    if len(topics) > MAX_BATCH_TOPICS:
+        raise GeminiServiceError(
+            f"Batch requests accept at most {MAX_BATCH_TOPICS} topics; got {len(topics)}."
+        )
+    if not topics:
+        return []
 
-    api_key = _require_api_key()
-    _configure_client(api_key)  # Cache-aware setup keeps repeated requests fast.
+    _genai.ensure_configured(GeminiServiceError)
 
     selected_model = model or os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    numbered_topics = "\n".join(f"{index}. {topic}" for index, topic in enumerate(topics, 1))
+    labels = ", ".join(f"[OUTLINE {index}]" for index in range(1, len(topics) + 1))
+
     try:
-        generative_model = genai.GenerativeModel(selected_model)
+        generative_model = _genai.get_model(selected_model)
         prompt = (
-            "You are helping an instructor design a web programming lesson. "
-            "Return a concise outline with 3-5 bullet points that cover the key "
-            "concepts for the topic: "
-            f"{normalized_topic}."
+            "You are helping an instructor design web programming lessons. "
+            "For each topic below, return a concise outline with 3-5 bullet points "
+            "that cover the key concepts. Start each outline on its own line with "
+            f"its label ({labels}) and add no other text.\n"
+            f"{numbered_topics}"
         )
-        response = generative_model.generate_content(prompt)
-        outline_text = getattr(response, "text", "").strip()
+        response = await _generate_with_retry(generative_model, prompt)
+        outline_text = _genai.response_text(response)
     except Exception as exc:  # pragma: no cover - depends on remote API.
-        raw_message = str(exc).strip()
-        if raw_message:
-            detail = f": {raw_message}"
-        else:
-            fallback = exc.__class__.__name__
-            detail = f": {fallback}"
+        raise _service_error(exc, "lesson outlines") from exc
+
+    outlines = _split_batch_outlines(outline_text, len(topics))
+    return [{"topic": topic, "outline": outline} for topic, outline in zip(topics, outlines)]
+
+
+async def generate_many(
+    topics: Sequence[str], model: str | None = None
+) -> list[dict[str, str | list[str]]]:
+    """Generate one outline per topic with concurrent single-topic requests.
+
+    Unlike ``generate_lesson_outlines`` each topic gets its own prompt, but
+    ``asyncio.gather`` sends them all at once, so the batch takes about as
+    long as the slowest call (subject to the rate limiter). A failed topic
+    becomes ``{"topic": ..., "error": ...}`` instead of failing the batch.
+
+    Raises:
+        GeminiServiceError: When the batch exceeds ``MAX_BATCH_TOPICS`` or
+            credentials are missing.
+    """
+
+    if len(topics) > MAX_BATCH_TOPICS:
         raise GeminiServiceError(
-            f"Failed to generate lesson outline{detail}."
-        ) from exc
+            f"Batch requests accept at most {MAX_BATCH_TOPICS} topics; got {len(topics)}."
+        )
+    # Configuration problems affect every topic, so fail the whole batch here
+    # rather than repeating the same error once per topic. Replay mode serves
+    # from the cache and needs no credentials.
+    if _cache_mode() != "replay":
+        _genai.ensure_configured(GeminiServiceError)
+
+    results = await asyncio.gather(
+        *(generate_lesson_outline(topic, model) for topic in topics), return_exceptions=True
+    )
+    outlines: list[dict[str, str | list[str]]] = []
+    for topic, result in zip(topics, results):
+        if isinstance(result, GeminiServiceError):
+            outlines.append({"topic": topic, "error": str(result)})
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            outlines.append(result)
+    return outlines
+
+
+def warm_up(model: str | None = None) -> None:
+    """Configure the SDK and build the default model ahead of the first request.
+
+    Called from the FastAPI lifespan so the first learner to ask for an
+    outline does not pay the one-time setup cost.
+
+    Raises:
+        GeminiServiceError: When credentials are missing or the SDK is not installed.
+    """
+
+    _genai.ensure_configured(GeminiServiceError)
+    _genai.get_model(model or os.getenv("GEMINI_MODEL", "gemini-2.5-flash"))
+
+
+def generate_lesson_outline_sync(topic: str, model: str | None = None) -> dict[str, str | list[str]]:
+    """Blocking wrapper around ``generate_lesson_outline`` for scripts and notebooks.
+
+    FastAPI routes should ``await`` the coroutine directly; this helper only
+    exists for callers without a running event loop, such as the lab
+    notebooks or a quick REPL check.
+    """
 
-    outline = _parse_outline_lines(outline_text) if outline_text else []
-    return {"topic": normalized_topic, "outline": outline}
+    return asyncio.run(generate_lesson_outline(topic, model))
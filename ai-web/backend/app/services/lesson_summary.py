@@ -10,56 +10,20 @@ class.
 from __future__ import annotations
 
 import os
-from functools import lru_cache
+import re
 from typing import List
 
-# Import the Gemini SDK lazily so unit tests (or classrooms without credentials)
-# can still import the module and read through the teaching notes.
-try:
-    import google.generativeai as genai
-except ImportError as exc:  # pragma: no cover - handled during runtime usage.
-    genai = None  # type: ignore[assignment]
-    _IMPORT_ERROR = exc
-else:
-    _IMPORT_ERROR = None
+from app.services import _genai
+
+# Leading Markdown bullets (including U+2022), numbering, and whitespace that
+# models put in front of summary items, compiled once at import.
+_LEADING_BULLET_RE = re.compile(r"^[-*\u2022.0-9\s]+")
 
 
 class LessonSummaryServiceError(RuntimeError):
     """Raised when the lesson summary helper cannot fulfill a request."""
 
 
-def _require_api_key() -> str:
-    """Read the API key from the environment and raise a descriptive error.
-
-    The helper keeps API key access in one place so the error message remains
-    consistent every time an instructor demonstrates a misconfigured setup.
-    """
-
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise LessonSummaryServiceError(
-            "GEMINI_API_KEY is not configured. Add it to backend/.env before calling the service."
-        )
-    return api_key
-
-
-@lru_cache(maxsize=1)
-def _configure_client(api_key: str) -> bool:
-    """Configure the global Gemini client once per process.
-
-    The return value is a simple boolean so callers can ignore the result and
-    focus on the fact that the client has been prepared for use.
-    """
-
-    if genai is None:  # pragma: no cover - depends on optional dependency.
-        raise LessonSummaryServiceError(
-            "google-generativeai is not installed. Run `pip install google-generativeai` to enable the feature."
-        ) from _IMPORT_ERROR
-
-    genai.configure(api_key=api_key)
-    return True
-
-
 def _parse_outline_lines(raw_outline: str) -> List[str]:
     """Convert the model response into a clean list of outline bullet points.
 
@@ -68,55 +32,43 @@ def _parse_outline_lines(raw_outline: str) -> List[str]:
     plain text list items.
     """
 
-    lines: List[str] = []
-    for line in raw_outline.splitlines():
-        cleaned = line.strip()
-        if not cleaned:
-            continue
-        # Remove leading numbering/bullet characters that models often return.
-        cleaned = cleaned.lstrip("-*•0123456789. \t")
-        if cleaned:
-            lines.append(cleaned)
-    return lines
+    # Remove leading numbering/bullet characters that models often return.
+    sub = _LEADING_BULLET_RE.sub
+    return [cleaned for line in raw_outline.splitlines() if (cleaned := sub("", line.strip()))]
 
 
-def generate_lesson_summary(topic: str, model: str | None = None) -> dict[str, str | list[str]]:
+async def generate_lesson_summary(topic: str, model: str | None = None) -> dict[str, str | list[str]]:
     """Generate a lesson summary for the requested topic using Gemini.
 
     Args:
-        topic: Instructor-provided lesson topic from the frontend form.
+        topic: Instructor-provided lesson topic from the frontend form. The
+            router's ``constr`` already strips it and rejects empty values.
         model: Optional override so the labs can experiment with different
             Gemini releases. Defaults to ``GEMINI_MODEL`` or ``gemini-2.5-flash``.
 
     Returns:
-        Dictionary containing the normalized topic string and a list of summary
+        Dictionary containing the topic string and a list of summary
         bullet points. The structure matches the response model defined in
         ``app/routers/lesson_summary.py``.
 
     Raises:
-        ValueError: If the topic is empty after trimming whitespace.
         LessonSummaryServiceError: When credentials are missing, the SDK is not
             installed, or the Gemini API reports an error.
     """
 
-    normalized_topic = topic.strip()
-    if not normalized_topic:
-        raise ValueError("Topic must not be empty.")
-
-    api_key = _require_api_key()
-    _configure_client(api_key)  # Cache-aware setup keeps repeated requests fast.
+    _genai.ensure_configured(LessonSummaryServiceError)  # Flag-guarded setup keeps repeated requests fast.
 
     selected_model = model or os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
     try:
-        generative_model = genai.GenerativeModel(selected_model)
+        generative_model = _genai.get_model(selected_model)
         prompt = (
             "You are helping an instructor summarize a web programming lesson. "
             "Return a concise summary with 3-5 bullet points that highlight the key "
             "takeaways for the topic: "
-            f"{normalized_topic}."
+            f"{topic}."
         )
-        response = generative_model.generate_content(prompt)
-        outline_text = getattr(response, "text", "").strip()
+        response = await generative_model.generate_content_async(prompt)
+        outline_text = _genai.response_text(response)
     except Exception as exc:  # pragma: no cover - depends on remote API.
         raw_message = str(exc).strip()
         if raw_message:
@@ -128,5 +80,5 @@ def generate_lesson_summary(topic: str, model: str | None = None) -> dict[str, s
             f"Failed to generate lesson summary{detail}."
         ) from exc
 
-    outline = _parse_outline_lines(outline_text) if outline_text else []
-    return {"topic": normalized_topic, "outline": outline}
+    outline = _parse_outline_lines(outline_text)
+    return {"topic": topic, "outline": outline}
@@ -0,0 +1,114 @@
+"""Client-side rate limiting for Gemini requests.
+
+Gemini enforces per-account quotas on requests per minute (RPM) and tokens per
+minute (TPM). When several workers send requests at once they can exceed those
+quotas together, and the resulting 429 responses trigger retries that make the
+overload worse. This module keeps each worker within its share of the quota,
+so requests wait briefly on the client instead of failing at the API.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+
+def _read_limit(name: str) -> float:
+    """Read a non-negative per-minute limit from the environment (0 = unlimited)."""
+
+    raw_value = os.getenv(name, "").strip()
+    if not raw_value:
+        return 0.0
+    try:
+        value = float(raw_value)
+    except ValueError as exc:
+        raise ValueError(f"{name} must be a number; got {raw_value!r}.") from exc
+    return max(value, 0.0)
+
+
+class TokenBucket:
+    """Two token buckets (requests and model tokens) refilled continuously.
+
+    Both buckets start full and refill at ``limit / 60`` units per second up
+    to one minute's allowance. A limit of ``0`` disables that bucket.
+    ``acquire`` holds a lock while waiting, so callers are served in arrival
+    order and a burst cannot overdraw the buckets. The lock is created per
+    event loop, because an ``asyncio.Lock`` cannot be shared between loops
+    and ``generate_lesson_outline_sync`` starts a fresh loop on every call.
+    """
+
+    def __init__(self, rpm: float, tpm: float) -> None:
+        self.rpm = rpm
+        self.tpm = tpm
+        self.request_tokens = rpm
+        self.token_tokens = tpm
+        self.last_update = time.monotonic()
+        self._lock: asyncio.Lock | None = None
+        self._lock_loop: asyncio.AbstractEventLoop | None = None
+
+    @classmethod
+    def from_env(cls) -> TokenBucket:
+        """Build a bucket from ``GEMINI_RPM``/``GEMINI_TPM``, split across workers.
+
+        The quotas apply to the whole account, but each gunicorn worker keeps
+        its own bucket. Dividing by ``WEB_CONCURRENCY`` gives every worker an
+        equal share.
+        """
+
+        workers = max(int(os.getenv("WEB_CONCURRENCY", "1") or "1"), 1)
+        return cls(_read_limit("GEMINI_RPM") / workers, _read_limit("GEMINI_TPM") / workers)
+
+    @property
+    def unlimited(self) -> bool:
+        """Whether both limits are disabled, making ``acquire`` a no-op."""
+
+        return not self.rpm and not self.tpm
+
+    def _loop_lock(self) -> asyncio.Lock:
+        """Return the lock for the running event loop, creating it on first use."""
+
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def _refill(self) -> None:
+        """Add the tokens earned since the previous refill, capped at capacity."""
+
+        now = time.monotonic()
+        elapsed = now - self.last_update
+        self.last_update = now
+        if self.rpm:
+            self.request_tokens = min(self.rpm, self.request_tokens + elapsed * self.rpm / 60)
+        if self.tpm:
+            self.token_tokens = min(self.tpm, self.token_tokens + elapsed * self.tpm / 60)
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        """Wait until one request and ``estimated_tokens`` tokens are available.
+
+        Demands larger than a full bucket (an oversized prompt, or a worker
+        share below one request per minute) are capped at the bucket size so
+        they wait for a full refill rather than forever.
+        """
+
+        if self.unlimited:
+            return
+
+        needed_requests = min(1.0, self.rpm)
+        needed_tokens = min(float(estimated_tokens), self.tpm)
+        async with self._loop_lock():
+            while True:
+                self._refill()
+                wait_time = 0.0
+                if self.rpm and self.request_tokens < needed_requests:
+                    wait_time = (needed_requests - self.request_tokens) * 60 / self.rpm
+                if self.tpm and self.token_tokens < needed_tokens:
+                    wait_time = max(wait_time, (needed_tokens - self.token_tokens) * 60 / self.tpm)
+                if wait_time <= 0:
+                    break
+                await asyncio.sleep(wait_time)
+
+            self.request_tokens -= needed_requests
+            self.token_tokens -= needed_tokens
@@ -0,0 +1,30 @@
+#!/bin/sh
+# Production launcher for the FastAPI backend.
+#
+# Several uvicorn workers share the load under gunicorn. The Docker image runs
+# this script by default (docker-compose.yml overrides it with a single
+# reloading uvicorn process for the labs); from a host checkout, run
+# `./start-production.sh`. Every knob can be tuned through environment
+# variables without rebuilding the image.
+
+set -e
+
+# gunicorn imports app.main relative to the backend directory.
+cd "$(dirname "$0")"
+
+NPROC="$(nproc 2>/dev/null || echo 2)"
+
+# 2 x CPU + 1 workers is gunicorn's recommended starting point.
+WORKERS="${WEB_CONCURRENCY:-$((2 * NPROC + 1))}"
+# Workers read WEB_CONCURRENCY to take their share of account-wide quotas
+# (see app/services/rate_limit.py), so publish the computed count.
+export WEB_CONCURRENCY="${WORKERS}"
+
+# --worker-connections becomes uvicorn's --limit-concurrency, so each worker
+# answers 503 instead of queueing unbounded prompt/history payloads in memory.
+exec gunicorn app.main:app \
+    --worker-class uvicorn_worker.UvicornWorker \
+    --workers "${WORKERS}" \
+    --bind "0.0.0.0:${PORT:-8000}" \
+    --worker-connections "${WORKER_CONNECTIONS:-1000}" \
+    --timeout "${GUNICORN_TIMEOUT:-120}"
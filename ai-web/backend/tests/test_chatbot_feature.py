@@ -5,14 +5,18 @@ This script tests the chatbot service and router to ensure they work correctly
 before deploying to the live environment. Run this from the backend directory.
 """
 
+import asyncio
 import sys
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 # Mock the genai module before importing our services
 mock_genai = MagicMock()
 sys.modules['google.generativeai'] = mock_genai
 
-from app.services.chatbot import send_chat_message, ChatbotServiceError
+from pydantic import ValidationError
+
+from app.services._genai import get_model
+from app.services.chatbot import send_chat_message, stream_chat_message, ChatbotServiceError
 from app.routers.chatbot import ChatRequest, ChatMessage
 
 
@@ -25,33 +29,57 @@ def test_service_layer():
     mock_response.text = "FastAPI is a modern web framework for Python."
     
     mock_model = MagicMock()
-    mock_model.generate_content.return_value = mock_response
+    mock_model.generate_content_async = AsyncMock(return_value=mock_response)
     mock_genai.GenerativeModel.return_value = mock_model
     
     # Set a fake API key
     with patch.dict('os.environ', {'GEMINI_API_KEY': 'test-key'}):
-        result = send_chat_message(
+        result = asyncio.run(send_chat_message(
             message="What is FastAPI?",
             history=[
-                {"role": "user", "content": "Hello"},
-                {"role": "assistant", "content": "Hi there!"}
+                ChatMessage(role="user", content="Hello"),
+                ChatMessage(role="assistant", content="Hi there!")
             ]
-        )
+        ))
     
     assert result['role'] == 'assistant'
     assert len(result['content']) > 0
     print("✓ Service layer works correctly")
 
 
+def test_stream_service_layer():
+    """Test that the streaming service yields each Gemini chunk in order."""
+    print("Testing streaming service layer...")
+
+    async def fake_stream():
+        for text in ["FastAPI ", "", "is fast."]:
+            yield MagicMock(text=text)
+
+    mock_model = MagicMock()
+    mock_model.generate_content_async = AsyncMock(return_value=fake_stream())
+    mock_genai.GenerativeModel.return_value = mock_model
+    get_model.cache_clear()  # Drop the model cached by earlier tests.
+
+    async def collect():
+        return [chunk async for chunk in stream_chat_message(message="What is FastAPI?")]
+
+    with patch.dict('os.environ', {'GEMINI_API_KEY': 'test-key'}):
+        chunks = asyncio.run(collect())
+
+    assert chunks == ["FastAPI ", "is fast."]
+    assert mock_model.generate_content_async.call_args.kwargs == {"stream": True}
+    print("✓ Streaming service layer works correctly")
+
+
 def test_empty_message_validation():
     """Test that empty messages are rejected."""
     print("Testing empty message validation...")
     
     try:
-        send_chat_message(message="   ")
-        assert False, "Should have raised ValueError"
-    except ValueError as e:
-        assert "must not be empty" in str(e)
+        ChatRequest(message="   ")
+        assert False, "Should have raised ValidationError"
+    except ValidationError as e:
+        assert "at least 1 character" in str(e)
         print("✓ Empty message validation works")
 
 
@@ -84,9 +112,9 @@ def test_conversation_context_building():
     from app.services.chatbot import _build_conversation_context
     
     history = [
-        {"role": "user", "content": "What is React?"},
-        {"role": "assistant", "content": "React is a JavaScript library."},
-        {"role": "user", "content": "What about hooks?"}
+        ChatMessage(role="user", content="What is React?"),
+        ChatMessage(role="assistant", content="React is a JavaScript library."),
+        ChatMessage(role="user", content="What about hooks?")
     ]
     
     context = _build_conversation_context(history)
@@ -104,6 +132,7 @@ if __name__ == "__main__":
     
     try:
         test_service_layer()
+        test_stream_service_layer()
         test_empty_message_validation()
         test_request_models()
         test_conversation_context_building()
@@ -1,40 +1,287 @@
+import asyncio
 import sys
 import types
 from pathlib import Path
 
 import pytest
 from fastapi import HTTPException
+from pydantic import ValidationError
+from tenacity import wait_none
 
 BACKEND_DIR = Path(__file__).resolve().parents[1]
 if str(BACKEND_DIR) not in sys.path:
     sys.path.insert(0, str(BACKEND_DIR))
 
-from app.routers.gemini import LessonOutlineIn, lesson_outline
+from app.routers.gemini import (
+    LessonOutlineIn,
+    LessonOutlinesIn,
+    lesson_outline,
+    lesson_outlines_parallel,
+)
+from app.services import _genai
 from app.services import gemini as gemini_service
+from app.services import lesson_summary as lesson_summary_service
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    gemini_service._RESPONSE_CACHE.clear()
+    yield
+    gemini_service._RESPONSE_CACHE.clear()
+    gemini_service._cache_key.cache_clear()
+
+
+def _install_dummy_genai(monkeypatch, model_cls):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(_genai, "_CONFIGURED", False)
+    _genai.get_model.cache_clear()
+    monkeypatch.setattr(
+        _genai,
+        "genai",
+        types.SimpleNamespace(configure=lambda **_kwargs: None, GenerativeModel=model_cls),
+    )
 
 
 def test_lesson_outline_http_error_includes_exception_fallback(monkeypatch):
     monkeypatch.setenv("GEMINI_API_KEY", "test-key")
-    gemini_service._configure_client.cache_clear()
+    monkeypatch.setattr(_genai, "_CONFIGURED", False)
+    _genai.get_model.cache_clear()
 
     class DummyGenerativeModel:
         def __init__(self, *_args, **_kwargs):
             pass
 
-        def generate_content(self, _prompt):  # pragma: no cover - exercised through router call
+        async def generate_content_async(self, _prompt):  # pragma: no cover - exercised through router call
             raise RuntimeError()
 
     dummy_genai = types.SimpleNamespace(
         configure=lambda **_kwargs: None,
         GenerativeModel=DummyGenerativeModel,
     )
-    monkeypatch.setattr(gemini_service, "genai", dummy_genai)
+    monkeypatch.setattr(_genai, "genai", dummy_genai)
 
     payload = LessonOutlineIn(topic="widgets")
 
     with pytest.raises(HTTPException) as exc_info:
-        lesson_outline(payload)
+        asyncio.run(lesson_outline(payload))
 
     error = exc_info.value
     assert error.status_code == 503
     assert error.detail == "Failed to generate lesson outline: RuntimeError."
+
+
+def test_lesson_outline_cache_serves_repeat_topics(monkeypatch):
+    calls = []
+
+    class CountingGenerativeModel:
+        def __init__(self, *_args, **_kwargs):
+            pass
+
+        async def generate_content_async(self, prompt):
+            calls.append(prompt)
+            return types.SimpleNamespace(text="- HTML\n- CSS")
+
+    _install_dummy_genai(monkeypatch, CountingGenerativeModel)
+    monkeypatch.delenv("GEMINI_CACHE_MODE", raising=False)
+
+    first = asyncio.run(gemini_service.generate_lesson_outline("layouts"))
+    first["outline"].append("mutated by caller")
+    second = asyncio.run(gemini_service.generate_lesson_outline("layouts"))
+
+    assert len(calls) == 1
+    assert second == {"topic": "layouts", "outline": ["HTML", "CSS"]}
+
+
+def test_lesson_outline_replay_mode_raises_on_cache_miss(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.setenv("GEMINI_CACHE_MODE", "replay")
+
+    with pytest.raises(gemini_service.GeminiServiceError, match="GEMINI_CACHE_MODE=replay"):
+        asyncio.run(gemini_service.generate_lesson_outline("uncached topic"))
+
+
+def test_lesson_outline_sync_wrapper_runs_the_async_service(monkeypatch):
+    class DummyGenerativeModel:
+        def __init__(self, *_args, **_kwargs):
+            pass
+
+        async def generate_content_async(self, _prompt):
+            return types.SimpleNamespace(text="1. Routing\n2. Templates")
+
+    _install_dummy_genai(monkeypatch, DummyGenerativeModel)
+    monkeypatch.setenv("GEMINI_CACHE_MODE", "disabled")
+
+    result = gemini_service.generate_lesson_outline_sync("flask")
+
+    assert result == {"topic": "flask", "outline": ["Routing", "Templates"]}
+
+
+def test_lesson_outlines_batch_splits_labelled_reply(monkeypatch):
+    prompts = []
+
+    class BatchGenerativeModel:
+        def __init__(self, *_args, **_kwargs):
+            pass
+
+        async def generate_content_async(self, prompt):
+            prompts.append(prompt)
+            return types.SimpleNamespace(
+                text="[OUTLINE 2]\n- Props\n- State\n[OUTLINE 1]\n- Selectors\n- Box model"
+            )
+
+    _install_dummy_genai(monkeypatch, BatchGenerativeModel)
+
+    result = asyncio.run(gemini_service.generate_lesson_outlines(["CSS", "React", "Docker"]))
+
+    assert len(prompts) == 1
+    assert "1. CSS\n2. React\n3. Docker" in prompts[0]
+    assert result == [
+        {"topic": "CSS", "outline": ["Selectors", "Box model"]},
+        {"topic": "React", "outline": ["Props", "State"]},
+        {"topic": "Docker", "outline": []},
+    ]
+
+
+def test_lesson_outlines_request_rejects_oversized_batches():
+    with pytest.raises(ValidationError):
+        LessonOutlinesIn(topics=["topic"] * (gemini_service.MAX_BATCH_TOPICS + 1))
+
+
+def test_parse_outline_lines_strips_bullets_and_numbering():
+    raw = "  1. Semantic HTML\n\n- Forms\n* Accessibility \n\u2022 ARIA roles"
+
+    assert gemini_service._parse_outline_lines(raw) == [
+        "Semantic HTML",
+        "Forms",
+        "Accessibility",
+        "ARIA roles",
+    ]
+
+
+def test_unicode_bullet_is_stripped_by_outline_and_summary_parsers():
+    assert gemini_service._parse_outline_lines("• React basics") == ["React basics"]
+    assert lesson_summary_service._parse_outline_lines("• React basics") == ["React basics"]
+
+
+def test_fast_outline_parser_matches_python_parser():
+    if gemini_service._parse_outline_lines_fast is None:
+        pytest.skip("numba is not installed")
+
+    bullets = ["- ", "* ", "• ", "3. ", "  ", "\t"]
+    items = ["Flexbox", "Grid layout ", "Café menus", "", "42"]
+    raw = "\n".join(
+        f"{bullets[index % len(bullets)]}{items[index % len(items)]}" for index in range(5000)
+    )
+
+    assert gemini_service._parse_outline_lines_fast(raw) == gemini_service._parse_outline_lines(raw)
+
+    # CRLF and the other boundaries str.splitlines honours, plus Unicode spaces.
+    separators = ["\r\n", "\r", "\x0b", "\x1e", "\u2028", "\n\u00a0"]
+    raw = "".join(
+        f"{bullets[index % len(bullets)]}{items[index % len(items)]}{separators[index % len(separators)]}"
+        for index in range(5000)
+    )
+    for text in (raw, raw.replace("\u2028", "\n").replace("\u00a0", " ")):
+        assert gemini_service._parse_outline_lines_fast(text) == gemini_service._parse_outline_lines(text)
+
+
+def test_lesson_outline_stream_yields_bullets_across_chunk_boundaries(monkeypatch):
+    async def fake_stream():
+        for text in ["- Sem", "antic HTML\n* For", "ms\n\n", "3. Accessibility"]:
+            yield types.SimpleNamespace(text=text)
+
+    class StreamingGenerativeModel:
+        def __init__(self, *_args, **_kwargs):
+            pass
+
+        async def generate_content_async(self, _prompt, stream=False):
+            assert stream is True
+            return fake_stream()
+
+    _install_dummy_genai(monkeypatch, StreamingGenerativeModel)
+    monkeypatch.delenv("GEMINI_CACHE_MODE", raising=False)
+
+    async def collect():
+        return [bullet async for bullet in gemini_service.generate_lesson_outline_stream("html")]
+
+    assert asyncio.run(collect()) == ["Semantic HTML", "Forms", "Accessibility"]
+    # The completed stream is cached for the non-streaming endpoint as well.
+    assert asyncio.run(gemini_service.generate_lesson_outline("html")) == {
+        "topic": "html",
+        "outline": ["Semantic HTML", "Forms", "Accessibility"],
+    }
+
+
+def test_lesson_outline_retries_transient_errors(monkeypatch):
+    attempts = []
+
+    class FlakyGenerativeModel:
+        def __init__(self, *_args, **_kwargs):
+            pass
+
+        async def generate_content_async(self, _prompt):
+            attempts.append(_prompt)
+            if len(attempts) < 3:
+                raise ConnectionError("connection reset")
+            return types.SimpleNamespace(text="- Retries")
+
+    _install_dummy_genai(monkeypatch, FlakyGenerativeModel)
+    monkeypatch.setenv("GEMINI_CACHE_MODE", "disabled")
+    monkeypatch.setattr(gemini_service._generate_with_retry.retry, "wait", wait_none())
+
+    result = asyncio.run(gemini_service.generate_lesson_outline("resilience"))
+
+    assert len(attempts) == 3
+    assert result["outline"] == ["Retries"]
+
+
+def test_generate_many_reports_failed_topics_inline(monkeypatch):
+    class PartlyFailingGenerativeModel:
+        def __init__(self, *_args, **_kwargs):
+            pass
+
+        async def generate_content_async(self, prompt):
+            if "broken" in prompt:
+                raise ValueError("blocked prompt")
+            return types.SimpleNamespace(text="- Basics")
+
+    _install_dummy_genai(monkeypatch, PartlyFailingGenerativeModel)
+    monkeypatch.setenv("GEMINI_CACHE_MODE", "disabled")
+
+    result = asyncio.run(gemini_service.generate_many(["forms", "broken", "routing"]))
+
+    assert result == [
+        {"topic": "forms", "outline": ["Basics"]},
+        {"topic": "broken", "error": "Failed to generate lesson outline: blocked prompt."},
+        {"topic": "routing", "outline": ["Basics"]},
+    ]
+
+
+def test_lesson_outlines_parallel_returns_503_when_api_key_is_missing(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.setattr(_genai, "_CONFIGURED", False)
+    monkeypatch.setenv("GEMINI_CACHE_MODE", "disabled")
+
+    payload = LessonOutlinesIn(topics=["forms", "routing"])
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(lesson_outlines_parallel(payload))
+
+    assert exc_info.value.status_code == 503
+    assert "GEMINI_API_KEY" in exc_info.value.detail
+
+
+def test_lesson_outline_handles_missing_response_text(monkeypatch):
+    class EmptyGenerativeModel:
+        def __init__(self, *_args, **_kwargs):
+            pass
+
+        async def generate_content_async(self, _prompt):
+            return types.SimpleNamespace(text=None)
+
+    _install_dummy_genai(monkeypatch, EmptyGenerativeModel)
+    monkeypatch.setenv("GEMINI_CACHE_MODE", "disabled")
+
+    result = asyncio.run(gemini_service.generate_lesson_outline("empty"))
+
+    assert result == {"topic": "empty", "outline": []}
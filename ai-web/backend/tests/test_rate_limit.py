@@ -0,0 +1,130 @@
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services import rate_limit
+from app.services.rate_limit import TokenBucket
+
+
+class FakeClock:
+    """Monotonic clock that only advances when the bucket sleeps."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _install_clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", clock.sleep)
+    return clock
+
+
+def test_bucket_waits_once_requests_per_minute_are_used(monkeypatch):
+    clock = _install_clock(monkeypatch)
+    bucket = TokenBucket(rpm=2, tpm=0)
+
+    async def three_requests():
+        for _ in range(3):
+            await bucket.acquire(estimated_tokens=100)
+
+    asyncio.run(three_requests())
+
+    # Two requests fit in the full bucket; the third waits for 1/2 minute.
+    assert clock.sleeps == [30.0]
+
+
+def test_bucket_waits_for_token_budget(monkeypatch):
+    clock = _install_clock(monkeypatch)
+    bucket = TokenBucket(rpm=0, tpm=600)
+
+    async def two_requests():
+        await bucket.acquire(estimated_tokens=500)
+        await bucket.acquire(estimated_tokens=300)
+
+    asyncio.run(two_requests())
+
+    # 100 tokens remain, so 200 more accrue at 10 tokens per second.
+    assert clock.sleeps == [20.0]
+
+
+def test_bucket_is_reusable_across_event_loops(monkeypatch):
+    real_sleep = asyncio.sleep
+    clock = _install_clock(monkeypatch)
+
+    async def yielding_sleep(seconds):
+        # Yield so the other callers actually wait on the lock.
+        await clock.sleep(seconds)
+        await real_sleep(0)
+
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", yielding_sleep)
+    bucket = TokenBucket(rpm=1, tpm=0)
+
+    async def three_concurrent_requests():
+        await asyncio.gather(*(bucket.acquire(100) for _ in range(3)))
+
+    # Each asyncio.run starts a new loop, as generate_lesson_outline_sync does.
+    asyncio.run(three_concurrent_requests())
+    asyncio.run(three_concurrent_requests())
+
+    assert clock.sleeps == [60.0] * 5
+
+
+def test_from_env_splits_quota_across_workers(monkeypatch):
+    monkeypatch.setenv("GEMINI_RPM", "60")
+    monkeypatch.setenv("GEMINI_TPM", "")
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+
+    bucket = TokenBucket.from_env()
+
+    assert bucket.rpm == 15
+    assert bucket.tpm == 0
+    assert not bucket.unlimited
+
+
+def _launcher_env(tmp_path, monkeypatch):
+    """Put a fake gunicorn on PATH that prints the env it was started with."""
+
+    fake_gunicorn = tmp_path / "gunicorn"
+    fake_gunicorn.write_text('#!/bin/sh\necho "WEB_CONCURRENCY=${WEB_CONCURRENCY}"\n')
+    fake_gunicorn.chmod(0o755)
+    fake_nproc = tmp_path / "nproc"
+    fake_nproc.write_text("#!/bin/sh\necho 3\n")
+    fake_nproc.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}:{os.environ['PATH']}")
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+
+
+@pytest.mark.skipif(shutil.which("sh") is None, reason="requires a POSIX shell")
+def test_default_launcher_exports_worker_count(tmp_path, monkeypatch):
+    _launcher_env(tmp_path, monkeypatch)
+
+    result = subprocess.run(
+        ["sh", str(BACKEND_DIR / "start-production.sh")],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # 2 x 3 CPUs + 1 workers, exported so each worker's bucket sees the split.
+    assert result.stdout.strip() == "WEB_CONCURRENCY=7"
+    monkeypatch.setenv("WEB_CONCURRENCY", "7")
+    monkeypatch.setenv("GEMINI_RPM", "70")
+    assert TokenBucket.from_env().rpm == 10
@@ -1,70 +1,200 @@
+import hashlib
+import json
 import nbformat as nbf
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-import textwrap
+
+# orjson encodes notebooks much faster than the stdlib json module; fall back
+# to json with the same layout when it is not installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 ROOT = Path("ai-web/labs")
-ROOT.mkdir(parents=True, exist_ok=True)
+
+# Set VALIDATE=1 to check every notebook against the nbformat schema; cells
+# are built as plain dicts, so this is the only schema check.
+_VALIDATE = bool(os.environ.get("VALIDATE"))
+
+# The committed notebooks are written in exactly this layout (sorted keys,
+# 2-space indent, trailing newline), so regenerating an unchanged lab matches
+# the file on disk byte for byte. Set NB_COMPACT=1 to emit compact JSON
+# (roughly half the bytes) for throwaway builds.
+_COMPACT = bool(os.environ.get("NB_COMPACT"))
+_ORJSON_OPTIONS = 0
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE
+    if not _COMPACT:
+        _ORJSON_OPTIONS |= orjson.OPT_INDENT_2
+
+# Directories already created during this run, so each one costs a single
+# mkdir call no matter how many notebooks are written into it.
+_MKDIR_DONE = set()
+
+
+def _ensure(path: Path) -> None:
+    if path in _MKDIR_DONE:
+        return
+    path.mkdir(parents=True, exist_ok=True)
+    _MKDIR_DONE.add(path)
+
+
+@lru_cache(maxsize=512)
+def _fast_dedent(text: str) -> str:
+    # Same result as textwrap.dedent(text).strip() in a single split/join pass:
+    # the margin is the common prefix of every non-blank line's indentation.
+    lines = text.split("\n")
+    indents = {line[: len(line) - len(line.lstrip(" \t"))] for line in lines if line.strip(" \t")}
+    cut = len(os.path.commonprefix(list(indents))) if indents else 0
+    return "\n".join(line[cut:] if line.strip(" \t") else "" for line in lines).strip()
+
+
+# Cells are plain nbformat 4.5 dicts rather than nbformat.v4.new_*_cell()
+# nodes; ids are filled in by notebook() once each cell's position is known.
+def _markdown_cell(source: str):
+    return {"cell_type": "markdown", "id": "", "metadata": {}, "source": source}
 
 
 def md(text: str):
-    return nbf.v4.new_markdown_cell(textwrap.dedent(text).strip())
+    return _markdown_cell(_fast_dedent(text))
 
 
 def code(text: str):
-    return nbf.v4.new_code_cell(textwrap.dedent(text).strip())
+    return {
+        "cell_type": "code",
+        "execution_count": None,
+        "id": "",
+        "metadata": {},
+        "outputs": [],
+        "source": _fast_dedent(text),
+    }
+
+
+# Opening cell of every notebook. It has no indentation to strip, so it is
+# formatted straight into a markdown cell without going through md().
+_HEADER_TMPL = "# {title}\n\n*This lab notebook provides guided steps. All commands are intended for local execution.*"
 
 
 def notebook(title: str, cells):
-    nb = nbf.v4.new_notebook()
-    nb.cells = [
-        md(
-            f"# {title}\n\n*This lab notebook provides guided steps. All commands are intended for local execution.*"
-        )
-    ]
-    nb.cells.extend(cells)
-    return nb
+    nb_cells = [_markdown_cell(_HEADER_TMPL.format(title=title)), *cells]
+    # Derive ids from the title and position rather than randomly, so
+    # regenerating an unchanged lab yields byte-identical output.
+    for index, cell in enumerate(nb_cells):
+        cell["id"] = hashlib.blake2b(f"{title}:{index}".encode("utf-8"), digest_size=4).hexdigest()
+    return {"cells": nb_cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5}
+
+
+def _dump_nb(nb) -> list[bytes]:
+    # Store sources as lists of lines, as nbformat does, so git diffs stay
+    # line-based.
+    for cell in nb["cells"]:
+        cell["source"] = cell["source"].splitlines(True)
+    if orjson is not None:
+        return [orjson.dumps(nb, option=_ORJSON_OPTIONS)]
+    # Returns the payload as chunks so the fallback's trailing newline is
+    # gathered by writev instead of copying the whole document to append it.
+    if _COMPACT:
+        text = json.dumps(nb, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = json.dumps(nb, indent=2, sort_keys=True, ensure_ascii=False)
+    return [text.encode("utf-8"), b"\n"]
+
+
+def _write_chunks(fd: int, chunks: list[bytes]) -> None:
+    if len(chunks) > 1 and hasattr(os, "writev"):
+        try:
+            written = os.writev(fd, chunks)
+        except OSError:
+            written = 0
+        if written == sum(map(len, chunks)):
+            return
+        chunks = [b"".join(chunks)[written:]]
+    for chunk in chunks:
+        view = memoryview(chunk)
+        while view:
+            view = view[os.write(fd, view):]
 
 
 def write_notebook(name: str, title: str, cells):
     path = ROOT / f"{name}.ipynb"
-    with path.open("w", encoding="utf-8") as handle:
-        nbf.write(notebook(title, cells), handle)
-    print(f"Written: {path}")
+    _ensure(path.parent)
+    # Labs are registered as builder functions so each worker only creates
+    # the cells of the notebook it is writing.
+    if callable(cells):
+        cells = cells()
+    # Serialize in memory, then hand the whole payload to the OS in one write
+    # instead of streaming small chunks through a text-mode file object.
+    nb = notebook(title, cells)
+    if _VALIDATE:
+        nbf.validate(nbf.from_dict(nb))
+    chunks = _dump_nb(nb)
+    # Leave identical files untouched so a no-op regeneration writes nothing
+    # and does not bump modification times; the size check avoids reading
+    # files that obviously changed.
+    try:
+        if path.stat().st_size == sum(map(len, chunks)) and path.read_bytes() == b"".join(chunks):
+            return path, False
+    except FileNotFoundError:
+        pass
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        _write_chunks(fd, chunks)
+    finally:
+        os.close(fd)
+    return path, True
+
+
+def write_all(specs):
+    # Each worker serializes and writes its own lab; results come back in
+    # submission order so the log stays stable between runs.
+    with ThreadPoolExecutor(max_workers=min(8, len(specs) or 1)) as pool:
+        for path, written in pool.map(lambda spec: write_notebook(*spec), specs):
+            print(f"{'Written' if written else 'Unchanged'}: {path}")
+
+
+# Fixed text shared by every acceptance/homework cell, built once at import.
+# These cells are assembled from unindented strings, so they skip md()'s dedent.
+_ACCEPT_HEADER = "## Validation / acceptance checks\n```bash\n# locally\n"
+_ACCEPT_FOOTER = "\n- React development mode shows the described UI state without console errors."
+_HOMEWORK_HEADER = "## Homework / extensions\n"
 
 
 def acceptance(commands: str, expectations: str):
-    return md(
-        f"## Validation / acceptance checks\n```bash\n# locally\n{commands}\n```\n- {expectations}\n- React development mode shows the described UI state without console errors."
-    )
+    return _markdown_cell("".join((_ACCEPT_HEADER, commands, "\n```\n- ", expectations, _ACCEPT_FOOTER)))
 
 
 def homework(items):
     bullet = "\n".join(f"- {item}" for item in items)
-    return md(f"## Homework / extensions\n{bullet}")
+    return _markdown_cell(_HOMEWORK_HEADER + bullet)
 
 
 labs = []
 
+
 # ---------------------------------------------------------------------------
 # Lab 01
-lab1_cells = [
-    md(
-        """## Objectives
+def _lab1_cells():
+    return [
+        md(
+            """## Objectives
 - A FastAPI backend is scaffolded with health and echo routes.
 - A Vite React frontend is outlined with modern tooling defaults.
 - A Git repository is initialized with environment templates.
 """
-    ),
-    md(
-        """## What will be learned
+        ),
+        md(
+            """## What will be learned
 - The structure of a basic FastAPI service is reviewed.
 - Development-time CORS settings are configured.
 - Vite-powered React scaffolding steps are rehearsed.
 - Git initialization practices are reinforced.
 """
-    ),
-    md(
-        """## Prerequisites & install
+        ),
+        md(
+            """## Prerequisites & install
 The container workflow depends on these locally installed tools:
 
 ```bash
@@ -86,17 +216,17 @@ docker compose up
 docker compose down
 ```
 """
-    ),
-    md(
-        """## Step-by-step tasks
+        ),
+        md(
+            """## Step-by-step tasks
 Each step configures local source files that the Docker stack will mount so secrets remain outside the built images.
 
 ### Step 1: Backend folder layout and Dockerfile
 A backend folder is created with starter FastAPI files and a Dockerfile that installs dependencies inside the image.
 """
-    ),
-    code(
-        """
+        ),
+        code(
+            """
 from pathlib import Path
 base = Path("ai-web/backend")
 base.mkdir(parents=True, exist_ok=True)
@@ -116,6 +246,18 @@ python-dotenv
 google-generativeai
 faiss-cpu
 numpy
+orjson
+''')
+
+# Render JSON responses with orjson's C encoder; FastAPI's own ORJSONResponse
+# is deprecated, so the app keeps a small local equivalent.
+(base / "app" / "responses.py").write_text('''import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
 ''')
 
 # Create the FastAPI entrypoint with health and echo routes.
@@ -123,7 +265,9 @@ numpy
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-app = FastAPI()
+from .responses import ORJSONResponse
+
+app = FastAPI(default_response_class=ORJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173"],
@@ -163,14 +307,14 @@ CMD ["uvicorn", "app.main:app", "--host", "0.0.0.0", "--port", "8000"]
 
 print("Backend scaffold and Dockerfile were written under ai-web/backend.")
 """
-    ),
-    md(
-        """### Step 2: Frontend placeholders and Dockerfile
+        ),
+        md(
+            """### Step 2: Frontend placeholders and Dockerfile
 Frontend placeholders are positioned so Vite React components (`src/App.jsx`, `src/main.jsx`) can be customized while the generated `vite.config.js` continues to manage dev server defaults. A lightweight Dockerfile installs Node.js dependencies for the Vite dev server.
 """
-    ),
-    code(
-        """
+        ),
+        code(
+            """
 from pathlib import Path
 frontend = Path("ai-web/frontend")
 src = frontend / "src"
@@ -311,14 +455,14 @@ CMD ["npm", "run", "dev", "--", "--host"]
 
 print("Frontend placeholders and Dockerfile were written under ai-web/frontend.")
 """
-    ),
-    md(
-        """### Step 3: Docker Compose orchestration
+        ),
+        md(
+            """### Step 3: Docker Compose orchestration
 A top-level `docker-compose.yml` is created so the backend and frontend can be started together with a single command.
 """
-    ),
-    code(
-        """
+        ),
+        code(
+            """
 from pathlib import Path
 compose = Path("ai-web/docker-compose.yml")
 compose.parent.mkdir(parents=True, exist_ok=True)
@@ -352,14 +496,14 @@ services:
 
 print("Docker Compose file was written under ai-web/docker-compose.yml.")
 """
-    ),
-    md(
-        """### Step 4: Git initialization
+        ),
+        md(
+            """### Step 4: Git initialization
 Git is initialized locally so changes can be tracked.
 """
-    ),
-    md(
-        """
+        ),
+        md(
+            """
 ```bash
 cd ai-web
 git init
@@ -367,39 +511,42 @@ git add .
 git commit -m "Lab 1 scaffold"
 ```
 """
-    ),
+        ),
 
-    acceptance(
-        "docker compose up -d\ncurl http://localhost:8000/health\ncurl -X POST http://localhost:8000/echo -H 'Content-Type: application/json' -d '{\"msg\":\"hello\"}'\ndocker compose down",
-        "HTTP 200 responses include status \"ok\" and the echoed payload while the stack runs in Docker.",
-    ),
-    homework([
-        "A README entry is expanded to document backend and frontend start commands.",
-        "A GitHub repository is connected for remote backups.",
-    ]),
-]
+        acceptance(
+            "docker compose up -d\ncurl http://localhost:8000/health\ncurl -X POST http://localhost:8000/echo -H 'Content-Type: application/json' -d '{\"msg\":\"hello\"}'\ndocker compose down",
+            "HTTP 200 responses include status \"ok\" and the echoed payload while the stack runs in Docker.",
+        ),
+        homework([
+            "A README entry is expanded to document backend and frontend start commands.",
+            "A GitHub repository is connected for remote backups.",
+        ]),
+    ]
+
+
+labs.append(("Lab01_FastAPI_Vite_and_Git", "Lab 01 · FastAPI, Vite, and Git", _lab1_cells))
 
-labs.append(("Lab01_FastAPI_Vite_and_Git", "Lab 01 · FastAPI, Vite, and Git", lab1_cells))
 
 # ---------------------------------------------------------------------------
 # Lab 02
-lab2_cells = [
-    md(
-        """## Objectives
+def _lab2_cells():
+    return [
+        md(
+            """## Objectives
 - A robust fetch helper with retry logic is introduced.
 - A controlled React form is configured with loading and error feedback.
 - Friendly error messages are surfaced in the UI.
 """
-    ),
-    md(
-        """## What will be learned
+        ),
+        md(
+            """## What will be learned
 - Retry helpers are structured for frontend HTTP calls.
 - Controlled form patterns in React are rehearsed.
 - Error boundaries in simple forms are practiced.
 """
-    ),
-    md(
-        """## Prerequisites & install
+        ),
+        md(
+            """## Prerequisites & install
 The following commands are intended for local execution.
 
 ```bash
@@ -407,15 +554,15 @@ cd ai-web/frontend
 npm install
 ```
 """
-    ),
-    md(
-        """## Step-by-step tasks
+        ),
+        md(
+            """## Step-by-step tasks
 ### Step 1: Retry helper placement
 A retry helper is positioned under src/lib.
 """
-    ),
-    code(
-        """
+        ),
+        code(
+            """
 from pathlib import Path
 lib = Path("ai-web/frontend/src/lib")
 lib.mkdir(parents=True, exist_ok=True)
@@ -434,14 +581,14 @@ lib.mkdir(parents=True, exist_ok=True)
 ''')
 print("Retry helper was written.")
 """
-    ),
-    md(
-        """### Step 2: Form integration
+        ),
+        md(
+            """### Step 2: Form integration
 App.jsx is updated so the retry helper wraps the echo request and error states remain friendly.
 """
-    ),
-    code(
-        """
+        ),
+        code(
+            """
 from pathlib import Path
 app_js = Path("ai-web/frontend/src/App.jsx")
 text = app_js.read_text()
@@ -463,38 +610,41 @@ if "setError(String(err));" in text:
 app_js.write_text(text)
 print("App.jsx was adjusted for retry and friendly errors.")
 """
-    ),
-    acceptance(
-        "curl -X POST http://localhost:8000/echo -H 'Content-Type: application/json' -d '{\"msg\":\"retry\"}'",
-        "The echoed payload is returned successfully after transient failures are simulated.",
-    ),
-    homework([
-        "Additional retry backoff strategies are outlined for future reference.",
-        "Form validation rules are drafted to prevent empty submissions.",
-    ]),
-]
+        ),
+        acceptance(
+            "curl -X POST http://localhost:8000/echo -H 'Content-Type: application/json' -d '{\"msg\":\"retry\"}'",
+            "The echoed payload is returned successfully after transient failures are simulated.",
+        ),
+        homework([
+            "Additional retry backoff strategies are outlined for future reference.",
+            "Form validation rules are drafted to prevent empty submissions.",
+        ]),
+    ]
+
+
+labs.append(("Lab02_HTTP_Forms_and_Retry", "Lab 02 · HTTP Forms and Retry", _lab2_cells))
 
-labs.append(("Lab02_HTTP_Forms_and_Retry", "Lab 02 · HTTP Forms and Retry", lab2_cells))
 
 # ---------------------------------------------------------------------------
 # Lab 03
-lab3_cells = [
-    md(
-        """## Objectives
+def _lab3_cells():
+    return [
+        md(
+            """## Objectives
 - A Gemini proxy endpoint is created in FastAPI.
 - React chat UI components are connected to the proxy.
 - API keys remain confined to the backend.
 """
-    ),
-    md(
-        """## What will be learned
+        ),
+        md(
+            """## What will be learned
 - Backend proxy patterns for hosted LLMs are practiced.
 - Basic chat state management in React is reviewed.
 - Environment variable usage is reinforced.
 """
-    ),
-    md(
-        """## Prerequisites & install
+        ),
+        md(
+            """## Prerequisites & install
 The following commands are intended for local execution.
 
 ```bash
@@ -503,45 +653,71 @@ cd ai-web/backend
 pip install google-generativeai
 ```
 """
-    ),
-    md(
-        """## Step-by-step tasks
+        ),
+        md(
+            """## Step-by-step tasks
 ### Step 1: Gemini helper module
 A backend helper is written so Gemini calls are centralized.
 """
-    ),
-    code(
-        """
+        ),
+        code(
+            """
 from pathlib import Path
 module = Path("ai-web/backend/app/llm.py")
 module.parent.mkdir(parents=True, exist_ok=True)
-module.write_text('''import os
-from typing import Dict, List, Any
+module.write_text('''import json
+import os
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from google import genai
 
+MODEL = "gemini-1.5-flash"
 
-def chat(messages: List[Dict[str, Any]]) -> str:
+
+@lru_cache(maxsize=1)
+def _client() -> genai.Client:
+  # One client per process: it keeps its HTTP connection pool, so later calls
+  # reuse open TLS connections instead of handshaking again.
   api_key = os.environ.get('GEMINI_API_KEY', '')
   if not api_key:
     raise RuntimeError('A backend API key is required.')
-  client = genai.Client(api_key=api_key)
-  response = client.models.generate_content(
-      model="gemini-1.5-flash",
+  return genai.Client(api_key=api_key)
+
+
+def chat(messages: List[Dict[str, Any]]) -> str:
+  response = _client().models.generate_content(
+      model=MODEL,
       contents=messages,
   )
   return response.text
+
+
+async def chat_stream(messages: List[Dict[str, Any]]) -> AsyncIterator[str]:
+  # Yields text as Gemini produces it instead of waiting for the full reply.
+  stream = await _client().aio.models.generate_content_stream(
+      model=MODEL,
+      contents=messages,
+  )
+  async for chunk in stream:
+    if chunk.text:
+      yield chunk.text
+
+
+def sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+  prefix = f"event: {event}\\\\n" if event else ""
+  return f"{prefix}data: {json.dumps(data)}\\\\n\\\\n"
 ''')
 print("Gemini helper was written.")
 """
-    ),
-    md(
-        """### Step 2: FastAPI route update
+        ),
+        md(
+            """### Step 2: FastAPI route update
 The FastAPI app is expanded with /api/chat.
 """
-    ),
-    code(
-        """
+        ),
+        code(
+            """
 from pathlib import Path
 main_path = Path("ai-web/backend/app/main.py")
 text = main_path.read_text()
@@ -574,14 +750,14 @@ if "chat_endpoint" not in text:
 else:
     print("FastAPI route already present.")
 """
-    ),
-    md(
-        """### Step 3: React chat surface
+        ),
+        md(
+            """### Step 3: React chat surface
 A lightweight chat component is appended to App.jsx so the proxy is exercised.
 """
-    ),
-    code(
-        """
+        ),
+        code(
+            """
 from pathlib import Path
 app_js = Path("ai-web/frontend/src/App.jsx")
 app_js.write_text('''import React, { useState } from 'react';
@@ -643,26 +819,26 @@ export default App;
 ''')
 print("Chat UI was seeded.")
 """
-    ),
-    acceptance(
-        "curl -X POST http://localhost:8000/api/chat -H 'Content-Type: application/json' -d '{\"messages\":[{\"role\":\"user\",\"content\":\"Hello\"}]}'",
-        "A JSON response with a text field is produced by the backend proxy.",
-    ),
-    homework([
-        "Streaming responses are researched for future enhancements.",
-        "Chat history persistence is sketched for the next lab.",
-    ]),
-]
+        ),
+        acceptance(
+            "curl -X POST http://localhost:8000/api/chat -H 'Content-Type: application/json' -d '{\"messages\":[{\"role\":\"user\",\"content\":\"Hello\"}]}'",
+            "A JSON response with a text field is produced by the backend proxy.",
+        ),
+        homework([
+            "Streaming responses are researched for future enhancements.",
+            "Chat history persistence is sketched for the next lab.",
+        ]),
+    ]
 
-labs.append(("Lab03_Gemini_Proxy_Chat", "Lab 03 · Gemini Proxy Chat", lab3_cells))
+
+labs.append(("Lab03_Gemini_Proxy_Chat", "Lab 03 · Gemini Proxy Chat", _lab3_cells))
 
 # ---------------------------------------------------------------------------
 # Additional labs
 
-labs.append((
-    "Lab04_Structured_JSON_and_Validation",
-    "Lab 04 · Structured JSON and Validation",
-    [
+
+def _lab4_cells():
+    return [
         md(
             """## Objectives
 - A planner endpoint is produced that returns structured JSON.
@@ -773,13 +949,14 @@ else:
             "Client-side rendering of planner steps is drafted for the frontend.",
             "Additional validation rules are explored for complex goals.",
         ]),
-    ],
-))
+    ]
+
 
-labs.append((
-    "Lab05_Simple_Agent_and_Tools",
-    "Lab 05 · Simple Agent and Tools",
-    [
+labs.append(("Lab04_Structured_JSON_and_Validation", "Lab 04 · Structured JSON and Validation", _lab4_cells))
+
+
+def _lab5_cells():
+    return [
         md(
             """## Objectives
 - A minimal agent loop is expressed with limited iterations.
@@ -910,17 +1087,18 @@ else:
             "Tool error handling pathways are drafted for robustness.",
             "Agent iteration limits are experimented with for longer plans.",
         ]),
-    ],
-))
+    ]
+
 
-labs.append((
-    "Lab06_Embeddings_and_FAISS",
-    "Lab 06 · Embeddings and FAISS",
-    [
+labs.append(("Lab05_Simple_Agent_and_Tools", "Lab 05 · Simple Agent and Tools", _lab5_cells))
+
+
+def _lab6_cells():
+    return [
         md(
             """## Objectives
 - Document chunking routines are introduced.
-- The \"text-embedding-004\" vectors are stored in a FAISS index.
+- The \"text-embedding-004\" vectors are stored in an 8-bit quantized FAISS index.
 - A search endpoint returns top results with scores.
 """
         ),
@@ -954,8 +1132,9 @@ from pathlib import Path
 vector_path = Path("ai-web/backend/app/vector.py")
 vector_path.write_text('''import json
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 from google import genai
 import numpy as np
@@ -967,7 +1146,12 @@ DATA_DIR.mkdir(parents=True, exist_ok=True)
 INDEX_FILE = DATA_DIR / "embeddings.index"
 META_FILE = DATA_DIR / "metadata.json"
 
+# The loaded index stays in memory and is reloaded only when the index file
+# changes, so searches skip the disk read after the first call.
+_loaded: Optional[Tuple[int, faiss.Index, List[str]]] = None
+
 
+@lru_cache(maxsize=1)
 def _client() -> genai.Client:
   api_key = os.environ.get('GEMINI_API_KEY', '')
   if not api_key:
@@ -996,17 +1180,27 @@ def embed_chunks(chunks: List[str]) -> np.ndarray:
 
 
 def save_index(chunks: List[str], vectors: np.ndarray) -> None:
-  index = faiss.IndexFlatIP(vectors.shape[1])
+  # 8-bit scalar quantization stores each dimension in one byte instead of
+  # four, so the index is a quarter of the size and scans less memory. The
+  # quantizer learns per-dimension ranges from the vectors it is trained on.
+  index = faiss.IndexScalarQuantizer(
+      vectors.shape[1], faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+  )
   faiss.normalize_L2(vectors)
+  index.train(vectors)
   index.add(vectors)
   faiss.write_index(index, str(INDEX_FILE))
   META_FILE.write_text(json.dumps({"chunks": chunks}))
 
 
 def load_index() -> Tuple[faiss.Index, List[str]]:
-  index = faiss.read_index(str(INDEX_FILE))
-  chunks = json.loads(META_FILE.read_text())["chunks"]
-  return index, chunks
+  global _loaded
+  mtime = INDEX_FILE.stat().st_mtime_ns
+  if _loaded is None or _loaded[0] != mtime:
+    index = faiss.read_index(str(INDEX_FILE))
+    chunks = json.loads(META_FILE.read_text())["chunks"]
+    _loaded = (mtime, index, chunks)
+  return _loaded[1], _loaded[2]
 
 
 def search(query: str, top_k: int = 3) -> List[Tuple[str, float]]:
@@ -1041,7 +1235,7 @@ print('Index was generated with', len(chunks), 'chunks.')
         ),
         md(
             """### Step 3: Search endpoint
-A FastAPI endpoint is published for vector search.
+A FastAPI endpoint is published for vector search. The index is loaded once at startup and kept in memory, so requests only pay for the query embedding and the search itself.
 """
         ),
         code(
@@ -1052,7 +1246,16 @@ text = main_path.read_text()
 if "search_endpoint" not in text:
     addition = '''
 from typing import Optional
-from .vector import search
+from .vector import load_index, search
+
+
+@app.on_event("startup")
+def prewarm_vector_index():
+    # Load the FAISS index before the first request instead of during it.
+    try:
+        load_index()
+    except FileNotFoundError:
+        print("No vector index yet; it will be loaded on first search.")
 
 
 @app.get("/api/search")
@@ -1074,18 +1277,20 @@ else:
             "Periodic index rebuild strategies are evaluated for large document sets.",
             "Client-side rendering of search results is explored.",
         ]),
-    ],
-))
+    ]
+
+
+labs.append(("Lab06_Embeddings_and_FAISS", "Lab 06 · Embeddings and FAISS", _lab6_cells))
 
-labs.append((
-    "Lab07_RAG_with_Citations",
-    "Lab 07 · RAG with Citations",
-    [
+
+def _lab7_cells():
+    return [
         md(
             """## Objectives
 - Retrieved chunks are combined into grounded answers.
 - Inline citation markers such as [S1] are emitted.
 - Refusals are documented when no evidence is present.
+- Answers are streamed token by token as server-sent events.
 """
         ),
         md(
@@ -1109,37 +1314,73 @@ pip install google-generativeai
         md(
             """## Step-by-step tasks
 ### Step 1: RAG helper
-A helper combines retrieved chunks with a Gemini completion.
+A helper combines retrieved chunks with a Gemini completion. The prompt keeps its fixed instructions at the start and the question at the end, so the shared prefix can be reused by providers that cache prompt prefixes.
 """
         ),
         code(
             """
 from pathlib import Path
 rag_path = Path("ai-web/backend/app/rag.py")
-rag_path.write_text('''from typing import List
+rag_path.write_text('''import asyncio
+from typing import AsyncIterator, List, Tuple
 
 from .vector import search
-from .llm import chat
+from .llm import chat, chat_stream, sse_event
+
+# Prompt order matters for latency. The fixed instructions come first, then the
+# retrieved sources, then the question. Backends that cache prompt prefixes
+# (Gemini context caching, vLLM prefix caching) can reuse the unchanged leading
+# part, so only the per-request tail has to be processed.
+INSTRUCTIONS = (
+    "Answer only from the provided snippets and cite them as [S#]. "
+    "If the snippets do not contain the answer, say so."
+)
+# Built once so every request starts with byte-identical text.
+PROMPT_PREFIX = INSTRUCTIONS + "\\\\n\\\\nSources:\\\\n"
+SOURCE_TEMPLATE = "[S{}] {}"
+QUESTION_LABEL = "\\\\n\\\\nQuestion: "
+NO_EVIDENCE = "No supported answer can be provided without evidence."
+
+
+def _build_prompt(question: str, retrieved: List[Tuple[str, float]]) -> list:
+    sources = "\\\\n".join(SOURCE_TEMPLATE.format(idx, text) for idx, (text, _) in enumerate(retrieved, 1))
+    return [
+        {"role": "user", "content": PROMPT_PREFIX + sources + QUESTION_LABEL + question},
+    ]
 
 
 def answer(question: str) -> dict:
     retrieved = search(question, 3)
     if not retrieved:
-        return {"answer": "No supported answer can be provided without evidence.", "chunks": []}
+        return {"answer": NO_EVIDENCE, "chunks": []}
     citations = [f"[S{idx + 1}]" for idx in range(len(retrieved))]
-    prompt = [
-        {"role": "user", "content": f"Question: {question}. Use only the provided snippets."},
-        {"role": "model", "content": "Sources:\n" + "\n".join(f"[S{idx + 1}] {text}" for idx, (text, _) in enumerate(retrieved))}
-    ]
-    completion = chat(prompt)
+    completion = chat(_build_prompt(question, retrieved))
     return {"answer": completion, "chunks": [{"id": f"S{idx + 1}", "text": text, "score": score} for idx, (text, score) in enumerate(retrieved)], "citations": citations}
+
+
+async def answer_stream(question: str) -> AsyncIterator[str]:
+    # Server-sent events: text chunks first, then the citations, then done.
+    retrieved = await asyncio.to_thread(search, question, 3)
+    if not retrieved:
+        yield sse_event({"content": NO_EVIDENCE})
+        yield sse_event({"citations": []})
+        yield sse_event({}, event="done")
+        return
+    try:
+        async for text in chat_stream(_build_prompt(question, retrieved)):
+            yield sse_event({"content": text})
+    except Exception as exc:
+        yield sse_event({"detail": str(exc)}, event="error")
+        return
+    yield sse_event({"citations": [f"[S{idx + 1}]" for idx in range(len(retrieved))]})
+    yield sse_event({}, event="done")
 ''')
 print("RAG helper was created.")
 """
         ),
         md(
             """### Step 2: Endpoint exposure
-The RAG helper is surfaced under /api/answer.
+The RAG helper is surfaced under /api/answer. A streaming variant at /api/answer/stream sends the answer as server-sent events while Gemini is still generating, followed by a final event carrying the citations.
 """
         ),
         code(
@@ -1149,7 +1390,8 @@ main_path = Path("ai-web/backend/app/main.py")
 text = main_path.read_text()
 if "answer_endpoint" not in text:
     addition = '''
-from .rag import answer as answer_question
+from fastapi.responses import StreamingResponse
+from .rag import answer as answer_question, answer_stream
 
 
 @app.get("/api/answer")
@@ -1158,6 +1400,11 @@ def answer_endpoint(q: str):
     if not result.get("chunks"):
         return {"answer": "No supported answer can be provided without evidence.", "citations": []}
     return result
+
+
+@app.get("/api/answer/stream")
+async def answer_stream_endpoint(q: str):
+    return StreamingResponse(answer_stream(q), media_type="text/event-stream")
 '''
     main_path.write_text(text.rstrip() + "\n" + addition)
     print("Answer endpoint was appended.")
@@ -1173,13 +1420,14 @@ else:
             "Citation rendering is enhanced in the frontend chat UI.",
             "Fallback messaging is drafted for unanswered questions.",
         ]),
-    ],
-))
+    ]
+
+
+labs.append(("Lab07_RAG_with_Citations", "Lab 07 · RAG with Citations", _lab7_cells))
 
-labs.append((
-    "Lab08_TensorFlowJS_Browser_Inference",
-    "Lab 08 · TensorFlow.js Browser Inference",
-    [
+
+def _lab8_cells():
+    return [
         md(
             """## Objectives
 - TensorFlow.js is loaded in the browser for local inference.
@@ -1281,13 +1529,14 @@ print("TensorFlow.js demo was written.")
             "Image upload support is investigated for offline detection.",
             "Result overlays are explored to highlight detections on the video feed.",
         ]),
-    ],
-))
+    ]
+
+
+labs.append(("Lab08_TensorFlowJS_Browser_Inference", "Lab 08 · TensorFlow.js Browser Inference", _lab8_cells))
 
-labs.append((
-    "Lab09_Agent_Memory_SQLite",
-    "Lab 09 · Agent Memory with SQLite",
-    [
+
+def _lab9_cells():
+    return [
         md(
             """## Objectives
 - A SQLite schema is designed for sessions, messages, and memories.
@@ -1316,7 +1565,7 @@ pip install sqlite-utils
         md(
             """## Step-by-step tasks
 ### Step 1: Schema file
-A schema file is provided to capture sessions, messages, and memories.
+A schema file is provided to capture sessions, messages, and memories. Indexes are included so that recent messages per session and due memory reviews are found without scanning whole tables.
 """
         ),
         code(
@@ -1343,57 +1592,172 @@ CREATE TABLE IF NOT EXISTS memories (
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   next_review TIMESTAMP
 );
+
+CREATE INDEX IF NOT EXISTS idx_messages_session_created
+  ON messages(session_id, created_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_memories_session
+  ON memories(session_id, next_review);
 ''')
 print("Schema file was produced.")
 """
         ),
         md(
             """### Step 2: Repository helper
-A helper module is included for interacting with SQLite.
+A helper module is included for interacting with SQLite. A single write connection and a pool of read-only connections are opened lazily and reused, with WAL journaling so reads run in parallel and are not blocked by writes.
+
+The database location is read from `AI_WEB_DB`; `:memory:` is accepted for tests. In production the file is placed on a fast local disk, and a nightly `PRAGMA wal_checkpoint(TRUNCATE)` is scheduled so that the WAL file is reset after write bursts.
 """
         ),
         code(
             """
 from pathlib import Path
 repo_path = Path("ai-web/backend/app/repository.py")
-repo_path.write_text('''import sqlite3
+repo_path.write_text('''import atexit
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Optional, Sequence, Tuple
+
+# AI_WEB_DB=:memory: keeps the database in RAM, which suits tests. A private
+# in-memory database is visible only to the connection that opened it, so in
+# that mode reads go through the writer and no read pool is created.
+DB_PATH = os.environ.get("AI_WEB_DB", str(Path(__file__).resolve().parent / "data.sqlite3"))
+IN_MEMORY = DB_PATH == ":memory:"
+if IN_MEMORY:
+    WRITE_URI = "file::memory:"
+    READ_URI = None
+else:
+    WRITE_URI = Path(DB_PATH).resolve().as_uri()
+    READ_URI = f"{WRITE_URI}?mode=ro"
+READ_POOL_SIZE = os.cpu_count() or 1
+
+# WAL lets readers run while a write is in progress; NORMAL sync is safe under
+# WAL and skips an fsync per commit. journal_mode is stored in the database
+# file, so read-only connections only need the per-connection settings.
+READ_PRAGMAS = (
+    "PRAGMA temp_store=memory;"
+    "PRAGMA cache_size=-20000;"
+    "PRAGMA busy_timeout=5000;"
+)
+WRITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL;"
+    "PRAGMA synchronous=NORMAL;"
+    "PRAGMA wal_autocheckpoint=1000;"
+) + READ_PRAGMAS
 
-DB_PATH = Path(__file__).resolve().parent / "data.sqlite3"
+WRITE_CONN: Optional[sqlite3.Connection] = None
+READ_POOL: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+_init_lock = threading.Lock()
+_write_lock = threading.Lock()
+_read_pool_ready = False
 
 
-def get_connection():
-    conn = sqlite3.connect(DB_PATH)
+def _connect(uri: str, pragmas: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=256)
     conn.row_factory = sqlite3.Row
+    conn.executescript(pragmas)
+    atexit.register(conn.close)
     return conn
 
 
+def get_connection() -> sqlite3.Connection:
+    # The single writer, opened on first use; it also creates the file.
+    global WRITE_CONN
+    if WRITE_CONN is None:
+        with _init_lock:
+            if WRITE_CONN is None:
+                WRITE_CONN = _connect(WRITE_URI, WRITE_PRAGMAS)
+    return WRITE_CONN
+
+
+def _fill_read_pool():
+    # Read-only connections need the file to exist, so the writer opens first.
+    global _read_pool_ready
+    get_connection()
+    with _init_lock:
+        if not _read_pool_ready:
+            for _ in range(READ_POOL_SIZE):
+                READ_POOL.put(_connect(READ_URI, READ_PRAGMAS))
+            _read_pool_ready = True
+
+
 def apply_schema(schema_sql: str):
     conn = get_connection()
-    conn.executescript(schema_sql)
-    conn.commit()
-    conn.close()
+    with _write_lock:
+        conn.executescript(schema_sql)
+        conn.commit()
 
 
-def insert_message(session_id: str, role: str, content: str):
+def insert_messages(rows: Sequence[Tuple[str, str, str]]):
+    # One immediate transaction per batch: a single commit for all rows.
     conn = get_connection()
-    conn.execute(
-        "INSERT INTO messages (session_id, role, content) VALUES (?, ?, ?)",
-        (session_id, role, content),
-    )
-    conn.commit()
-    conn.close()
+    with _write_lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO messages (session_id, role, content) VALUES (?, ?, ?)",
+                rows,
+            )
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+
+
+def insert_message(session_id: str, role: str, content: str):
+    insert_messages([(session_id, role, content)])
+
+
+@contextmanager
+def _reader():
+    if IN_MEMORY:
+        conn = get_connection()
+        with _write_lock:
+            yield conn
+        return
+    if not _read_pool_ready:
+        _fill_read_pool()
+    conn = READ_POOL.get()
+    try:
+        yield conn
+    finally:
+        READ_POOL.put(conn)
 
 
 def list_recent_messages(session_id: str, limit: int = 10) -> Iterable[sqlite3.Row]:
-    conn = get_connection()
-    rows = conn.execute(
-        "SELECT role, content FROM messages WHERE session_id = ? ORDER BY created_at DESC LIMIT ?",
-        (session_id, limit),
-    ).fetchall()
-    conn.close()
-    return rows
+    with _reader() as conn:
+        return conn.execute(
+            "SELECT role, content FROM messages WHERE session_id = ? ORDER BY created_at DESC LIMIT ?",
+            (session_id, limit),
+        ).fetchall()
+
+
+# group_concat accepts its own ORDER BY from SQLite 3.44 on. Older builds do
+# not promise to feed an aggregate in subquery order, so they fetch the rows
+# in order and join them in Python instead.
+ORDERED_GROUP_CONCAT = sqlite3.sqlite_version_info >= (3, 44, 0)
+
+
+def concat_session(session_id: str) -> str:
+    # With ORDERED_GROUP_CONCAT SQLite joins the transcript in C, capped only
+    # by SQLITE_MAX_LENGTH (1 GB by default).
+    with _reader() as conn:
+        if ORDERED_GROUP_CONCAT:
+            row = conn.execute(
+                "SELECT group_concat(content, char(10) ORDER BY created_at, id) "
+                "FROM messages WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+            return row[0] or ""
+        rows = conn.execute(
+            "SELECT content FROM messages WHERE session_id = ? ORDER BY created_at, id",
+            (session_id,),
+        ).fetchall()
+    return "\\\\n".join(content for (content,) in rows)
 ''')
 print("Repository helper was created.")
 """
@@ -1404,7 +1768,7 @@ A plan is described to summarize conversations periodically.
 """
         ),
         md(
-            """A periodic job is proposed in which conversations are summarized into the memories table. The job is scheduled after a session surpasses a message threshold. A placeholder function is positioned so later labs can hook in summarization calls.
+            """A periodic job is proposed in which conversations are summarized into the memories table. The job is scheduled after a session surpasses a message threshold. A placeholder function is positioned so later labs can hook in summarization calls. The session transcript is fetched as one string assembled by SQLite with `group_concat`, ready to be passed to a summarizer.
 """
         ),
         code(
@@ -1413,10 +1777,14 @@ from pathlib import Path
 plan_path = Path("ai-web/backend/app/memory_plan.py")
 plan_path.write_text('''from datetime import datetime, timedelta
 
+from .repository import concat_session
+
 
 def plan_memory_summary(session_id: str) -> dict:
+    transcript = concat_session(session_id)
     return {
         "session_id": session_id,
+        "transcript_chars": len(transcript),
         "next_review": (datetime.utcnow() + timedelta(hours=6)).isoformat(),
         "status": "A summarization run has been scheduled.",
     }
@@ -1432,18 +1800,20 @@ print("Memory plan placeholder was drafted.")
             "A cron-style schedule is documented for invoking the summarization plan.",
             "Additional indexing strategies are explored for the messages table.",
         ]),
-    ],
-))
+    ]
+
+
+labs.append(("Lab09_Agent_Memory_SQLite", "Lab 09 · Agent Memory with SQLite", _lab9_cells))
 
-labs.append((
-    "Lab10_Evaluation_Latency_Cache",
-    "Lab 10 · Evaluation, Latency, and Cache",
-    [
+
+def _lab10_cells():
+    return [
         md(
             """## Objectives
 - A tiny evaluation set is logged for backend prompts.
 - Latency and token usage metrics are recorded.
 - A naive cache hashes prompt plus tool context.
+- A semantic cache matches reworded prompts by embedding similarity.
 """
         ),
         md(
@@ -1451,6 +1821,7 @@ labs.append((
 - Evaluation harness design is reviewed for LLM flows.
 - Latency tracking is reinforced with timestamp instrumentation.
 - Cache strategies are described for simple reuse.
+- A bounded on-disk cache is shown to survive restarts.
 """
         ),
         md(
@@ -1460,7 +1831,7 @@ The following commands are intended for local execution.
 ```bash
 cd ai-web/backend
 . .venv/bin/activate
-pip install google-generativeai
+pip install google-generativeai diskcache faiss-cpu numpy orjson
 ```
 """
         ),
@@ -1484,20 +1855,44 @@ print("Evaluation dataset was created.")
         ),
         md(
             """### Step 2: Metrics helper
-A helper is provided to time requests and count tokens.
+A helper is provided to time requests, count tokens, and load the evaluation set once per process. It also keeps a small, capped FAISS index of past prompts so that reworded prompts can reuse an earlier answer when their embeddings are close enough. The index only points at exact-cache keys, so semantic hits expire together with the cached responses, and it is saved to disk in batches and at shutdown.
 """
         ),
         code(
             """
 from pathlib import Path
 metrics_path = Path("ai-web/backend/app/metrics.py")
-metrics_path.write_text('''import hashlib
+metrics_path.write_text('''import atexit
+import hashlib
 import json
+import threading
 import time
 from contextlib import contextmanager
-from typing import Dict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+import orjson
+
+from .vector import DATA_DIR, embed_chunks
 
 TOKEN_LOG: Dict[str, int] = {}
+EVAL_SET_FILE = Path(__file__).resolve().parent / "eval_set.json"
+
+SEMANTIC_INDEX_FILE = DATA_DIR / "semantic_cache.index"
+SEMANTIC_META_FILE = DATA_DIR / "semantic_cache.json"
+SEMANTIC_TOP_K = 4
+SEMANTIC_MAX_ENTRIES = 1024
+SEMANTIC_SAVE_EVERY = 50
+
+# The index maps prompt embeddings to exact-cache keys; responses stay in the
+# exact cache, so they share its size limit and expiry.
+_semantic_lock = threading.Lock()
+_semantic_index: Optional[faiss.Index] = None
+_semantic_entries: List[dict] = []
+_unsaved_stores = 0
 
 
 @contextmanager
@@ -1509,19 +1904,106 @@ def track_latency(label: str):
 
 
 def cache_key(prompt: str, tools: str) -> str:
-    payload = json.dumps({"prompt": prompt, "tools": tools}, sort_keys=True)
-    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    # A cache key needs no cryptographic strength; a 128-bit BLAKE2b digest
+    # is faster than SHA-256 and still effectively collision-free here.
+    payload = orjson.dumps({"prompt": prompt, "tools": tools}, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
 
 
 def record_tokens(label: str, count: int):
     TOKEN_LOG[label] = TOKEN_LOG.get(label, 0) + count
+
+
+@lru_cache(maxsize=1)
+def load_eval_set() -> Tuple[dict, ...]:
+    # Parsed once per process; evaluation runs share the same tuple.
+    return tuple(orjson.loads(EVAL_SET_FILE.read_bytes()))
+
+
+@lru_cache(maxsize=256)
+def _embed_prompt(prompt: str) -> np.ndarray:
+    # Normalized so inner product equals cosine similarity; a miss followed
+    # by a store embeds the prompt only once.
+    vector = embed_chunks([prompt])
+    faiss.normalize_L2(vector)
+    vector.setflags(write=False)
+    return vector
+
+
+def _load_semantic_index() -> Optional[faiss.Index]:
+    # The index and its metadata are written one after the other, so a crash
+    # in between can leave a missing or stale meta file. Positions would no
+    # longer line up, so start from an empty index of the same dimension.
+    global _semantic_index, _semantic_entries
+    if _semantic_index is None and SEMANTIC_INDEX_FILE.exists():
+        index = faiss.read_index(str(SEMANTIC_INDEX_FILE))
+        entries = json.loads(SEMANTIC_META_FILE.read_text()) if SEMANTIC_META_FILE.exists() else []
+        if index.ntotal != len(entries):
+            index, entries = faiss.IndexFlatIP(index.d), []
+        _semantic_index, _semantic_entries = index, entries
+    return _semantic_index
+
+
+def _save_semantic_index():
+    global _unsaved_stores
+    with _semantic_lock:
+        if _semantic_index is None or not _unsaved_stores:
+            return
+        faiss.write_index(_semantic_index, str(SEMANTIC_INDEX_FILE))
+        SEMANTIC_META_FILE.write_text(json.dumps(_semantic_entries))
+        _unsaved_stores = 0
+
+
+atexit.register(_save_semantic_index)
+
+
+def semantic_lookup(prompt: str, tools: str, cache: Any, threshold: float = 0.92) -> Optional[str]:
+    # Returns the exact-cache entry of the closest earlier prompt; entries the
+    # cache has expired or evicted are skipped.
+    with _semantic_lock:
+        index = _load_semantic_index()
+        if index is None or index.ntotal == 0:
+            return None
+    query = _embed_prompt(prompt)
+    with _semantic_lock:
+        scores, neighbors = index.search(query, min(SEMANTIC_TOP_K, index.ntotal))
+        keys = [
+            _semantic_entries[idx]["key"]
+            for score, idx in zip(scores[0], neighbors[0])
+            if score >= threshold and _semantic_entries[idx]["tools"] == tools
+        ]
+    for key in keys:
+        response = cache.get(key)
+        if response is not None:
+            return response
+    return None
+
+
+def semantic_store(prompt: str, tools: str, key: str):
+    global _semantic_index, _unsaved_stores
+    vector = _embed_prompt(prompt)
+    with _semantic_lock:
+        index = _load_semantic_index()
+        if index is None:
+            index = _semantic_index = faiss.IndexFlatIP(vector.shape[1])
+        if index.ntotal >= SEMANTIC_MAX_ENTRIES:
+            # Drop the oldest entry; a flat index shifts the rest down by one,
+            # which keeps positions aligned with _semantic_entries.
+            index.remove_ids(np.array([0], dtype=np.int64))
+            del _semantic_entries[0]
+        index.add(np.array(vector))
+        _semantic_entries.append({"tools": tools, "key": key})
+        _unsaved_stores += 1
+        save_now = _unsaved_stores >= SEMANTIC_SAVE_EVERY
+    if save_now:
+        _save_semantic_index()
 ''')
 print("Metrics helper was written.")
 """
         ),
         md(
             """### Step 3: Cache-enabled endpoint
-An evaluation endpoint is instrumented with caching and latency tracking.
+An evaluation endpoint is instrumented with caching and latency tracking. Responses are kept in a size-limited `diskcache` store with a one-hour expiry, so memory stays bounded and cached answers survive restarts. A streaming variant at /api/evaluate/stream sends the response as server-sent events and fills the same caches once generation finishes.
 """
         ),
         code(
@@ -1531,26 +2013,72 @@ main_path = Path("ai-web/backend/app/main.py")
 text = main_path.read_text()
 if "evaluation_endpoint" not in text:
     addition = '''
-from .metrics import cache_key, record_tokens, track_latency
-from .llm import chat as llm_chat
+import asyncio
 
-CACHE = {}
+from diskcache import Cache
+from fastapi.responses import StreamingResponse
+
+from .metrics import cache_key, record_tokens, semantic_lookup, semantic_store, track_latency
+from .llm import chat as llm_chat, chat_stream as llm_chat_stream, sse_event
+
+CACHE = Cache("/tmp/eval_cache", size_limit=512 * 1024 * 1024)
+CACHE_TTL_SECONDS = 3600
 
 
 @app.post("/api/evaluate")
-def evaluation_endpoint(payload: dict):
+async def evaluation_endpoint(payload: dict):
+    # Hashing stays inline (microseconds); disk cache reads and writes, the
+    # embedding lookups, and the Gemini call run in worker threads so the event
+    # loop keeps serving other requests.
     prompt = payload.get("prompt", "")
     tools = "".join(payload.get("tools", []))
     key = cache_key(prompt, tools)
-    if key in CACHE:
-        return {"cached": True, "response": CACHE[key]}
+    cached = await asyncio.to_thread(CACHE.get, key)
+    if cached is not None:
+        return {"cached": True, "response": cached}
+    cached = await asyncio.to_thread(semantic_lookup, prompt, tools, CACHE)
+    if cached is not None:
+        return {"cached": True, "semantic": True, "response": cached}
     with track_latency("evaluation"):
-        response = llm_chat([
+        response = await asyncio.to_thread(llm_chat, [
             {"role": "user", "content": prompt}
         ])
     record_tokens("evaluation", len(prompt.split()))
-    CACHE[key] = response
+    await asyncio.to_thread(CACHE.set, key, response, expire=CACHE_TTL_SECONDS)
+    await asyncio.to_thread(semantic_store, prompt, tools, key)
     return {"cached": False, "response": response}
+
+
+@app.post("/api/evaluate/stream")
+async def evaluation_stream_endpoint(payload: dict):
+    prompt = payload.get("prompt", "")
+    tools = "".join(payload.get("tools", []))
+    key = cache_key(prompt, tools)
+    cached = await asyncio.to_thread(CACHE.get, key)
+    if cached is None:
+        cached = await asyncio.to_thread(semantic_lookup, prompt, tools, CACHE)
+
+    async def events():
+        if cached is not None:
+            yield sse_event({"cached": True, "content": cached})
+            yield sse_event({}, event="done")
+            return
+        parts = []
+        try:
+            with track_latency("evaluation"):
+                async for text in llm_chat_stream([{"role": "user", "content": prompt}]):
+                    parts.append(text)
+                    yield sse_event({"content": text})
+        except Exception as exc:
+            yield sse_event({"detail": str(exc)}, event="error")
+            return
+        response = "".join(parts)
+        record_tokens("evaluation", len(prompt.split()))
+        await asyncio.to_thread(CACHE.set, key, response, expire=CACHE_TTL_SECONDS)
+        await asyncio.to_thread(semantic_store, prompt, tools, key)
+        yield sse_event({}, event="done")
+
+    return StreamingResponse(events(), media_type="text/event-stream")
 '''
     main_path.write_text(text.rstrip() + "\n" + addition)
     print("Evaluation endpoint was appended.")
@@ -1566,13 +2094,14 @@ else:
             "Token accounting is integrated with external monitoring dashboards.",
             "Additional evaluation prompts are composed for regression coverage.",
         ]),
-    ],
-))
+    ]
+
+
+labs.append(("Lab10_Evaluation_Latency_Cache", "Lab 10 · Evaluation, Latency, and Cache", _lab10_cells))
+
 
-labs.append((
-    "Lab11_Security_and_Hardening",
-    "Lab 11 · Security and Hardening",
-    [
+def _lab11_cells():
+    return [
         md(
             """## Objectives
 - Production CORS settings are tightened.
@@ -1595,31 +2124,49 @@ The following commands are intended for local execution.
 cd ai-web/backend
 . .venv/bin/activate
 pip install slowapi
+# Only when rate-limit counters are shared through Redis:
+pip install redis
 ```
 """
         ),
         md(
             """## Step-by-step tasks
 ### Step 1: Security settings module
-Security utilities are collected for reuse.
+Security utilities are collected for reuse. Rate-limit counters are kept in memory by default. When several workers run, `RATE_LIMIT_STORAGE_URI` is set to a Redis server reachable from the backend, such as `redis://redis:6379` for a `redis` service in docker-compose, so that all workers share one limit.
 """
         ),
         code(
             """
 from pathlib import Path
 security_path = Path("ai-web/backend/app/security.py")
-security_path.write_text('''from slowapi import Limiter
+security_path.write_text('''import os
+
+from slowapi import Limiter
 from slowapi.util import get_remote_address
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from .guards import ContentLengthLimitMiddleware
+
 SAFE_ORIGINS = ["https://example.com"]
 ALLOWED_FILES = {".txt", ".md"}
-limiter = Limiter(key_func=get_remote_address, default_limits=["60/minute"])
+# In-memory counters suit a single process. With several workers, point
+# RATE_LIMIT_STORAGE_URI at Redis (e.g. redis://redis:6379) so they share one
+# limit; the moving-window strategy then updates it with a server-side Lua script.
+RATE_LIMIT_STORAGE_URI = os.environ.get("RATE_LIMIT_STORAGE_URI", "memory://")
+limiter = Limiter(
+    key_func=get_remote_address,
+    default_limits=["60/minute"],
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy="moving-window",
+)
 
 
 def configure_security(app: FastAPI):
     app.state.limiter = limiter
+    # Middleware added later wraps earlier ones, so CORS goes last and also
+    # puts its headers on the size guard's 413/400 responses.
+    app.add_middleware(ContentLengthLimitMiddleware)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=SAFE_ORIGINS,
@@ -1633,19 +2180,37 @@ print("Security module was written.")
         ),
         md(
             """### Step 2: Payload guard
-A payload guard demonstrates enforcing limits and allow-lists.
+A payload guard demonstrates enforcing limits and allow-lists. A middleware rejects requests whose declared Content-Length is too large before the body is read, and enforce_size stays as a check on bodies that were already received.
 """
         ),
         code(
             """
 from pathlib import Path
 limits_path = Path("ai-web/backend/app/guards.py")
-limits_path.write_text('''from fastapi import HTTPException, UploadFile
+limits_path.write_text('''from fastapi import HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
 
 MAX_PAYLOAD_BYTES = 1024 * 1024
 ALLOWED_EXTENSIONS = {".txt", ".md", ".pdf"}
 
 
+class ContentLengthLimitMiddleware(BaseHTTPMiddleware):
+    # Rejects oversized requests from the declared Content-Length before the
+    # body is read. Chunked uploads carry no length, so enforce_size remains
+    # the check once a body is in memory.
+    async def dispatch(self, request: Request, call_next):
+        declared = request.headers.get("content-length")
+        if declared is not None:
+            try:
+                size = int(declared)
+            except ValueError:
+                return JSONResponse(status_code=400, content={"detail": "Content-Length header was invalid."})
+            if size > MAX_PAYLOAD_BYTES:
+                return JSONResponse(status_code=413, content={"detail": "Payload size limit was exceeded."})
+        return await call_next(request)
+
+
 def enforce_size(data: bytes):
     if len(data) > MAX_PAYLOAD_BYTES:
         raise HTTPException(status_code=413, detail="Payload size limit was exceeded.")
@@ -1678,13 +2243,14 @@ A checklist is referenced for the RAG pipeline.
             "Rate limiting thresholds are tuned for production traffic patterns.",
             "Security review notes are captured alongside deployment manifests.",
         ]),
-    ],
-))
+    ]
+
+
+labs.append(("Lab11_Security_and_Hardening", "Lab 11 · Security and Hardening", _lab11_cells))
 
-labs.append((
-    "Lab12_Deployment_and_Docker",
-    "Lab 12 · Deployment and Docker",
-    [
+
+def _lab12_cells():
+    return [
         md(
             """## Objectives
 - A backend Dockerfile is drafted with environment configuration guidance.
@@ -1713,19 +2279,27 @@ docker compose version
         md(
             """## Step-by-step tasks
 ### Step 1: Backend Dockerfile
-A Dockerfile is created for the FastAPI backend.
+A Dockerfile is created for the FastAPI backend. A builder stage turns the requirements into wheels using a BuildKit pip cache, and the runtime stage installs from those wheels offline, so rebuilds after source edits reuse the dependency layers.
 """
         ),
         code(
             """
 from pathlib import Path
 dockerfile_path = Path("ai-web/backend/Dockerfile")
-dockerfile_path.write_text('''FROM python:3.11-slim
+dockerfile_path.write_text('''# syntax=docker/dockerfile:1
+FROM python:3.11-slim AS builder
+WORKDIR /build
+COPY requirements.txt ./
+# The BuildKit cache mount keeps downloaded packages between builds.
+RUN --mount=type=cache,target=/root/.cache/pip pip wheel --wheel-dir=/wheels -r requirements.txt
+
+FROM python:3.11-slim
 ENV PYTHONDONTWRITEBYTECODE=1
 ENV PYTHONUNBUFFERED=1
 WORKDIR /app
 COPY requirements.txt ./
-RUN pip install --no-cache-dir -r requirements.txt
+# Wheels are bind-mounted from the builder, so they never become an image layer.
+RUN --mount=type=bind,from=builder,source=/wheels,target=/wheels pip install --no-cache-dir --no-index --find-links=/wheels -r requirements.txt
 COPY . ./
 CMD ["uvicorn", "app.main:app", "--host", "0.0.0.0", "--port", "8000"]
 ''')
@@ -1780,10 +2354,12 @@ Deployment steps are summarized for future reference.
             "CI/CD pipeline steps are enumerated for automated deployments.",
             "Frontend build artifacts are hosted on a static site provider checklist.",
         ]),
-    ],
-))
+    ]
+
+
+labs.append(("Lab12_Deployment_and_Docker", "Lab 12 · Deployment and Docker", _lab12_cells))
 
-for name, title, cells in labs:
-    write_notebook(name, title, cells)
+if __name__ == "__main__":
+    write_all(labs)
 
-print("All notebooks were generated under ai-web/labs.")
+    print("All notebooks were generated under ai-web/labs.")